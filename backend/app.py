@@ -1,25 +1,39 @@
+import asyncio
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Literal, Optional, Tuple
 
 import numpy as np
-import torch
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
 
+from artifact_store import load_torch_weights
+from field_simulator import TRACK_TO_CIRCUIT, default_field_strategy, field_entry_list, simulate_field, summarize_field
 from model_def import HybridLSTM
-from strategy_simulator import simulate_race, suggest_strategy
+from race_pace import predict_grid
+from sc_policy import decide as sc_decide
+from optimizer import (
+    DEFAULT_MAX_STOPS,
+    MAX_STOPS,
+    PitConstraints,
+    best_plan_per_sequence,
+    evaluate_plans,
+    plan_to_strategy,
+)
+from scheduler import SchedulerFull
+from serialization import negotiate
+from strategy_simulator import TYRE_PROFILES, simulate_race, suggest_strategy
+from sweep import default_grid, sweep
+from tyre_serving import FEAT_COLS, get_tyre_server, stint_features
 
 BASE_DIR = Path(__file__).resolve().parent
 TRACK_PARAMS_PATH = BASE_DIR / "data" / "track_params.json"
 MODEL_FEATURES_PATH = BASE_DIR / "model_features.json"
 MODEL_PATH = BASE_DIR / "models" / "hybrid_opt3_final.pth"
 
-BASE_DIR = Path(__file__).resolve().parent
-TRACK_PARAMS_PATH = BASE_DIR / "data" / "track_params.json"
-MODEL_FEATURES_PATH = BASE_DIR / "model_features.json"
-MODEL_PATH = BASE_DIR / "models" / "hybrid_opt3_final.pth"
+app = FastAPI(title="F1 Strategy Simulator API")
 
 # Enable CORS for the Streamlit/React frontend
 app.add_middleware(
@@ -46,12 +60,26 @@ SEQ_LEN = feats["seq_len"]
 # Load the Hybrid LSTM Model
 try:
     model = HybridLSTM(input_dim=len(opt3_features))
-    model.load_state_dict(torch.load(MODEL_PATH, map_location="cpu"))
+    load_torch_weights(model, "hybrid_opt3", MODEL_PATH)
     model.eval()
 except Exception as e:
     print(f"Model load failed: {e}")
     model = None
 
+def strategy_error(strategy: List[Tuple[str, int]], race_laps: int, track_key: str) -> Optional[str]:
+    """Why ``strategy`` cannot be simulated on this track, or None if it can."""
+    if not strategy:
+        return "Strategy has no stints."
+    for compound, laps in strategy:
+        if compound.upper() not in TYRE_PROFILES:
+            return f"Unsupported compound '{compound}'; use one of {', '.join(TYRE_PROFILES)}."
+        if int(laps) < 1:
+            return f"Stint on {compound.upper()} must be at least 1 lap, got {laps}."
+    total = sum(int(n) for _, n in strategy)
+    if total != race_laps:
+        return f"Strategy covers {total} laps; {track_key} is {race_laps} laps."
+    return None
+
 class StrategyRequest(BaseModel):
     track: str
     strategy: List[Tuple[str, int]]
@@ -68,6 +96,56 @@ class OptimizeRequest(BaseModel):
     base_lap_time: Optional[float] = None
     pit_loss: Optional[float] = None
     track_env: Optional[Dict[str, float]] = None
+    max_stops: int = Field(DEFAULT_MAX_STOPS, ge=0, le=MAX_STOPS)
+    min_stint: int = Field(8, ge=1)
+    max_stint: Optional[int] = Field(None, ge=1)
+    # (earliest, latest) lap for each stop in order, e.g. [[12, 20]] for the first stop
+    pit_windows: Optional[List[Tuple[int, int]]] = None
+
+class SweepRequest(BaseModel):
+    track: str
+    strategies: Optional[List[List[Tuple[str, int]]]] = None
+    compounds: List[str] = ["SOFT", "MEDIUM", "HARD"]
+    pit_loss: Optional[List[float]] = None
+    track_temp: Optional[List[float]] = None
+    base_lap_time: Optional[List[float]] = None
+    include_totals: bool = False
+
+class FieldRequest(BaseModel):
+    track: str
+    raceId: Optional[int] = None
+    circuitId: Optional[int] = None
+    strategies: Optional[Dict[str, List[Tuple[str, int]]]] = None
+    base_lap_time: Optional[float] = None
+    pit_loss: Optional[float] = None
+    track_env: Optional[Dict[str, float]] = None
+    n_sims: int = Field(default=1000, ge=1, le=20000)
+    seed: Optional[int] = None
+
+class SCDecisionRequest(BaseModel):
+    track: str
+    lap: int = Field(ge=1)
+    compound: str
+    tyre_age: int = Field(ge=0)
+    compounds_used: List[str] = []
+    stops_left: int = Field(default=1, ge=0)
+    status: Literal["SC", "VSC", "GREEN"] = "SC"
+    pit_loss: Optional[float] = None
+
+class TyreDegRequest(BaseModel):
+    compound: str
+    laps: Optional[List[Dict[str, float]]] = None
+    start_lap: int = Field(default=1, ge=1)
+    stint_laps: int = Field(default=20, ge=1, le=512)
+    total_laps: int = Field(default=57, ge=1)
+    track_temp: float = 35.0
+    air_temp: float = 25.0
+    start_fuel_kg: float = 100.0
+
+class RacePaceRequest(BaseModel):
+    circuitId: int
+    driverIds: Optional[List[int]] = None
+    grid: Optional[Dict[int, int]] = None
 
 @app.get("/health")
 def health():
@@ -78,7 +156,7 @@ def list_tracks():
     return {"tracks": list(TRACK_DATA.keys())}
 
 @app.post("/predict_strategy")
-def predict_strategy(req: StrategyRequest):
+def predict_strategy(req: StrategyRequest, request: Request):
     track_key = req.track.strip().title()
     if track_key not in TRACK_DATA:
         return {"error": f"Unknown track '{req.track}'."}
@@ -97,12 +175,36 @@ def predict_strategy(req: StrategyRequest):
         track_env=req.track_env,
     )
 
-    return {
+    return negotiate(request, {
         "track": track_key,
         "total_race_time": round(float(total), 3),
-        "lap_times": np.round(laps, 3).tolist(),
+        "lap_times": np.round(laps, 3),
         "delta_to_avg": round(float(total - (base_lap * len(laps))), 3)
-    }
+    })
+
+@app.post("/optimize_strategy")
+def optimize_strategy(req: OptimizeRequest, request: Request):
+    track_key = req.track.strip().title()
+    if track_key not in TRACK_DATA:
+        return {"error": f"Unknown track '{req.track}'."}
+
+    base_lap = req.base_lap_time if req.base_lap_time is not None else TRACK_DATA[track_key]["avg_lap"]
+    pit_loss = req.pit_loss if req.pit_loss is not None else TRACK_DATA[track_key]["pit_loss"]
+
+    result = evaluate_plans(
+        race_laps=int(TRACK_DATA[track_key]["laps"]),
+        compounds=[c.upper() for c in req.compounds],
+        base_lap=base_lap,
+        pit_loss=pit_loss,
+        model=model,
+        compound_cols=compound_cols,
+        optional_feats=optional_feats,
+        seq_len=SEQ_LEN,
+        track_env=req.track_env,
+        constraints=PitConstraints(min_stint=req.min_stint, max_stint=req.max_stint, stop_windows=req.pit_windows),
+        max_stops=req.max_stops,
+    )
+    return negotiate(request, {"track": track_key, **result})
 
 @app.post("/suggest_strategy")
 async def suggest_best_strategy(req: Request):
@@ -118,3 +220,142 @@ async def suggest_best_strategy(req: Request):
     if not result or result.get("best_strategy") is None:
         return {"error": "No valid strategy found."}
     return result
+
+@app.post("/sweep_strategy")
+def sweep_strategy(req: SweepRequest, request: Request):
+    track_key = req.track.strip().title()
+    if track_key not in TRACK_DATA:
+        return {"error": f"Unknown track '{req.track}'."}
+
+    track = TRACK_DATA[track_key]
+    race_laps = int(track["laps"])
+    if req.strategies:
+        strategies = req.strategies
+        for i, strategy in enumerate(strategies):
+            error = strategy_error(strategy, race_laps, track_key)
+            if error:
+                return {"error": f"strategies[{i}]: {error}"}
+    else:
+        plans = best_plan_per_sequence(race_laps, [c.upper() for c in req.compounds])
+        strategies = [plan_to_strategy(p, race_laps) for p in plans]
+        if not strategies:
+            return {"error": "No default strategy uses two dry compounds; pass 'strategies' or more compounds."}
+
+    result = sweep(
+        strategies,
+        pit_losses=req.pit_loss or default_grid(track["pit_loss"], 5.0, 21),
+        track_temps=req.track_temp or default_grid(32.5, 17.5, 36),
+        base_laps=req.base_lap_time or default_grid(track["avg_lap"], 2.0, 21),
+        include_totals=req.include_totals,
+    )
+    return negotiate(request, {"track": track_key, **result})
+
+@app.post("/simulate_field")
+def simulate_field_race(req: FieldRequest, request: Request):
+    track_key = req.track.strip().title()
+    if track_key not in TRACK_DATA:
+        return {"error": f"Unknown track '{req.track}'."}
+    circuit_id = req.circuitId if req.circuitId is not None else TRACK_TO_CIRCUIT.get(track_key)
+    if circuit_id is None:
+        return {"error": f"No circuitId known for track '{track_key}'; pass circuitId."}
+    try:
+        entries = field_entry_list(race_id=req.raceId, circuit_id=circuit_id)
+    except ValueError as exc:
+        return {"error": str(exc)}
+
+    track = TRACK_DATA[track_key]
+    race_laps = int(track["laps"])
+    overrides = {k.upper(): v for k, v in (req.strategies or {}).items()}
+    for code, strategy in overrides.items():
+        error = strategy_error(strategy, race_laps, track_key)
+        if error:
+            return {"error": f"Strategy for {code}: {error}"}
+    strategies = [
+        overrides.get(str(code).upper()) or default_field_strategy(i, race_laps)
+        for i, code in enumerate(entries["code"])
+    ]
+
+    result = simulate_field(
+        strategies,
+        pace_offsets=entries["pace_offset"].to_numpy(),
+        base_lap=req.base_lap_time if req.base_lap_time is not None else track["avg_lap"],
+        pit_loss=req.pit_loss if req.pit_loss is not None else track["pit_loss"],
+        n_sims=req.n_sims,
+        track_env=req.track_env,
+        seed=req.seed,
+    )
+    codes = entries["code"].astype(str).to_numpy()
+    return negotiate(request, {
+        "track": track_key,
+        "race": entries["race_name"].iloc[0],
+        "n_sims": req.n_sims,
+        "cars": summarize_field(entries, strategies, result),
+        # Driver codes in track order (P1 first) after each lap of the first simulation
+        "sample_running_order": codes[np.argsort(result["positions_by_lap"][:, 0, :], axis=1)].tolist(),
+    })
+
+@app.post("/sc_decision")
+def sc_decision(req: SCDecisionRequest):
+    track_key = req.track.strip().title()
+    if track_key not in TRACK_DATA:
+        return {"error": f"Unknown track '{req.track}'."}
+    try:
+        decision = sc_decide(
+            track_key,
+            lap=req.lap,
+            compound=req.compound,
+            tyre_age=req.tyre_age,
+            compounds_used=req.compounds_used,
+            stops_left=req.stops_left,
+            status=req.status,
+            pit_loss=req.pit_loss,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"track": track_key, "lap": req.lap, **decision}
+
+@app.post("/tyre_degradation")
+async def tyre_degradation(req: TyreDegRequest, request: Request):
+    if req.laps:
+        for i, row in enumerate(req.laps):
+            missing = [c for c in FEAT_COLS if c not in row]
+            if missing:
+                return {"error": f"laps[{i}] is missing {', '.join(missing)}; each lap needs {', '.join(FEAT_COLS)}."}
+        features = np.array([[row[c] for c in FEAT_COLS] for row in req.laps], dtype=np.float32)
+    else:
+        features = stint_features(req.start_lap, req.stint_laps, req.total_laps, req.track_temp, req.air_temp, req.start_fuel_kg)
+    server = await asyncio.to_thread(get_tyre_server)
+    try:
+        future = server.submit(features, req.compound)
+    except SchedulerFull as exc:
+        return JSONResponse({"error": str(exc)}, status_code=429, headers={"Retry-After": str(exc.retry_after)})
+    except ValueError as exc:
+        return {"error": str(exc)}
+    lap_times = await asyncio.wrap_future(future)
+    return negotiate(request, {
+        "compound": req.compound.upper(),
+        "lap_times": np.round(lap_times, 3),
+        "degradation": np.round(lap_times - lap_times[0], 3),
+    })
+
+@app.get("/tyre_degradation/metrics")
+def tyre_degradation_metrics():
+    return get_tyre_server().metrics()
+
+@app.post("/race_pace")
+def race_pace(req: RacePaceRequest):
+    try:
+        return predict_grid(
+            req.circuitId,
+            tuple(req.driverIds or ()),
+            tuple(sorted((req.grid or {}).items())),
+        )
+    except KeyError as exc:
+        return {"error": str(exc.args[0])}
+
+@app.get("/race_pace/{circuit_id}")
+def race_pace_for_circuit(circuit_id: int):
+    try:
+        return predict_grid(circuit_id)
+    except KeyError as exc:
+        return {"error": str(exc.args[0])}
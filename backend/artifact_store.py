@@ -0,0 +1,178 @@
+"""Versioned, memory-mapped model artifacts shared by all workers on a host.
+
+Each uvicorn worker used to ``torch.load`` its own copy of the weights. Here
+an artifact is published once as a flat ``data.bin`` plus ``manifest.json``
+under ``<root>/<name>/<version>/``, and every worker maps it copy-on-write,
+so read-only weights and lookup arrays live in one set of physical pages.
+The root defaults to /dev/shm when available (tmpfs, so the pages are the
+shared memory itself), in a directory named for the user and this checkout
+so two deployments on one host never serve each other's artifacts.
+
+Versions are hashes of the array contents and metadata. ``<root>/<name>/CURRENT`` names the live
+version and is replaced with ``os.replace``, so a publish is an atomic swap:
+readers pick up the new version on their next ``load`` while mappings already
+handed out stay valid.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent
+_SHM = Path("/dev/shm")
+_OWNER = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "user")
+_SHM_NAME = f"f1-artifacts-{_OWNER}-{hashlib.sha1(str(BASE_DIR).encode()).hexdigest()[:8]}"
+ARTIFACT_ROOT = Path(
+    os.environ.get("F1_ARTIFACT_DIR")
+    or (_SHM / _SHM_NAME if _SHM.is_dir() else BASE_DIR / ".artifacts")
+)
+ALIGN = 64
+
+
+@dataclass
+class Artifact:
+    name: str
+    version: str
+    arrays: Dict[str, np.ndarray]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+def source_fingerprint(path: Path) -> Dict[str, Any]:
+    st = path.stat()
+    return {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class ArtifactStore:
+    def __init__(self, root: Path = ARTIFACT_ROOT, keep_versions: int = 2) -> None:
+        self.root = Path(root)
+        self.keep_versions = keep_versions
+        self._loaded: Dict[str, Tuple[str, Artifact]] = {}
+        self._lock = threading.Lock()
+
+    def _pointer(self, name: str) -> Path:
+        return self.root / name / "CURRENT"
+
+    def current_version(self, name: str) -> Optional[str]:
+        try:
+            return self._pointer(name).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, name: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> str:
+        arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+        meta = meta or {}
+        digest = hashlib.sha256()
+        # meta is part of the version so a new source fingerprint always gets a fresh manifest
+        digest.update(json.dumps(meta, sort_keys=True).encode())
+        for key in sorted(arrays):
+            arr = arrays[key]
+            digest.update(f"{key}:{arr.dtype.str}:{arr.shape}".encode())
+            digest.update(arr.tobytes())
+        version = digest.hexdigest()[:16]
+
+        base = self.root / name
+        final = base / version
+        if not (final / "manifest.json").exists():
+            tmp = base / f".tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            tmp.mkdir(parents=True)
+            entries = {}
+            offset = 0
+            with (tmp / "data.bin").open("wb") as f:
+                for key in sorted(arrays):
+                    arr = arrays[key]
+                    pad = -offset % ALIGN
+                    f.write(b"\0" * pad)
+                    offset += pad
+                    entries[key] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+                    f.write(arr.tobytes())
+                    offset += arr.nbytes
+                f.flush()
+                os.fsync(f.fileno())
+            (tmp / "manifest.json").write_text(json.dumps({"arrays": entries, "meta": meta}))
+            try:
+                os.rename(tmp, final)
+            except OSError:
+                # Another worker published identical content first
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        pointer_tmp = base / f".CURRENT-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        pointer_tmp.write_text(version)
+        os.replace(pointer_tmp, self._pointer(name))
+        self._gc(name, version)
+        return version
+
+    def _gc(self, name: str, current: str) -> None:
+        versions = [p for p in (self.root / name).iterdir() if p.is_dir() and not p.name.startswith(".")]
+        stale = sorted((p for p in versions if p.name != current), key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in stale[max(0, self.keep_versions - 1):]:
+            # Workers still mapping these keep their pages until they swap
+            shutil.rmtree(path, ignore_errors=True)
+
+    def load(self, name: str) -> Optional[Artifact]:
+        """Map the live version, reusing the mapping while CURRENT is unchanged."""
+        version = self.current_version(name)
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._loaded.get(name)
+            if cached and cached[0] == version:
+                return cached[1]
+            path = self.root / name / version
+            manifest = json.loads((path / "manifest.json").read_text())
+            arrays: Dict[str, np.ndarray] = {}
+            entries = manifest["arrays"]
+            if entries:
+                raw = np.memmap(path / "data.bin", dtype=np.uint8, mode="c")
+                for key, spec in entries.items():
+                    dtype = np.dtype(spec["dtype"])
+                    count = int(np.prod(spec["shape"], dtype=np.int64))
+                    arrays[key] = raw[spec["offset"] : spec["offset"] + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+            artifact = Artifact(name=name, version=version, arrays=arrays, meta=manifest["meta"])
+            self._loaded[name] = (version, artifact)
+            return artifact
+
+    def get_or_publish(
+        self,
+        name: str,
+        source: Path,
+        build: Callable[[], Dict[str, np.ndarray]],
+        fingerprint: Optional[Dict[str, Any]] = None,
+    ) -> Artifact:
+        """Load ``name``, (re)publishing from ``build()`` when ``source`` changed on disk.
+
+        Callers that build from a slice of ``source`` can pass their own
+        ``fingerprint`` of exactly what ``build`` reads instead of the file stat.
+        """
+        fingerprint = fingerprint if fingerprint is not None else source_fingerprint(source)
+        artifact = self.load(name)
+        if artifact is not None and artifact.meta.get("source") == fingerprint:
+            return artifact
+        self.publish(name, build(), meta={"source": fingerprint})
+        return self.load(name)
+
+
+store = ArtifactStore()
+
+
+def load_torch_weights(module, name: str, source: Path, map_location: str = "cpu"):
+    """Load ``source`` state dict into ``module`` backed by the shared mapping."""
+    import torch
+
+    def build() -> Dict[str, np.ndarray]:
+        state = torch.load(source, map_location=map_location)
+        return {k: v.detach().cpu().numpy() for k, v in state.items()}
+
+    artifact = store.get_or_publish(name, source, build)
+    state = {k: torch.from_numpy(v) for k, v in artifact.arrays.items()}
+    # assign=True keeps the mapped tensors instead of copying into fresh parameters
+    module.load_state_dict(state, assign=True)
+    return module
@@ -0,0 +1,243 @@
+"""Backtest the predictors against every 2025 race in strategy_2025_race_only.csv.
+
+Each (EventName, Driver) group is replayed with the strategy it actually ran
+(compound per stint, pit laps from the StintID changes) through:
+
+- ``sim``: ``strategy_simulator.simulate_race`` with track_params.json pace,
+  pit loss and the event's mean track temperature;
+- ``rf[:N]``: main.py's lap-time pipeline (``engineer_features`` ->
+  ``train_lap_time_model`` -> ``simulate_stint_laps``), trained on the other
+  drivers at the same event so the scored driver is held out;
+- ``compare``: the full ``compare_strategies`` call on the driver's laps,
+  timed only (it predicts fixed template strategies, not the one raced).
+
+Lap-time MAE uses green-flag laps (TrackStatus 1). Pit in/out laps are
+missing from the extract, so total-time error is the signed sum of
+(predicted - actual) over the laps present. Events run in parallel across
+processes; each stage's per-group latency and overall throughput are
+reported so variants can be compared on accuracy versus speed.
+
+    python backtest.py --variants sim,rf:240,rf:60,compare --workers 4 --out backtest.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+DATA_PATH = BASE_DIR / "data" / "strategy_2025_race_only.csv"
+TRACK_PARAMS_PATH = BASE_DIR / "data" / "track_params.json"
+
+EVENT_TO_TRACK = {
+    "Abu Dhabi Grand Prix": "Abu Dhabi",
+    "Australian Grand Prix": "Australia",
+    "Austrian Grand Prix": "Austria",
+    "Bahrain Grand Prix": "Bahrain",
+    "Belgian Grand Prix": "Belgium",
+    "British Grand Prix": "Silverstone",
+    "Canadian Grand Prix": "Canada",
+    "Chinese Grand Prix": "China",
+    "Dutch Grand Prix": "Netherlands",
+    "Emilia Romagna Grand Prix": "Imola",
+    "Hungarian Grand Prix": "Hungary",
+    "Italian Grand Prix": "Monza",
+    "Japanese Grand Prix": "Japan",
+    "Las Vegas Grand Prix": "Las Vegas",
+    "Mexico City Grand Prix": "Mexico",
+    "Miami Grand Prix": "Miami",
+    "Monaco Grand Prix": "Monaco",
+    "Qatar Grand Prix": "Qatar",
+    "Saudi Arabian Grand Prix": "Jeddah",
+    "Singapore Grand Prix": "Singapore",
+    "Spanish Grand Prix": "Spain",
+    "São Paulo Grand Prix": "Brazil",
+    "United States Grand Prix": "Austin",
+}
+
+
+def actual_strategy(laps: pd.DataFrame) -> Tuple[List[Tuple[str, int]], List[int]]:
+    """(compound, stint length) list and pit laps reconstructed from StintID."""
+    stints = laps.groupby("StintID", sort=True).agg(compound=("Compound", "first"), last_lap=("LapNumber", "max"))
+    ends = stints["last_lap"].astype(int).tolist()
+    ends[-1] = int(laps["LapNumber"].max())
+    lengths = np.diff([0] + ends).tolist()
+    strategy = [(str(c).upper(), int(n)) for c, n in zip(stints["compound"], lengths) if n > 0]
+    return strategy, ends[:-1]
+
+
+def _score(pred: np.ndarray, laps: pd.DataFrame) -> Dict[str, float]:
+    idx = laps["LapNumber"].astype(int).to_numpy() - 1
+    ok = idx < len(pred)
+    predicted = pred[idx[ok]]
+    actual = laps["LapTimeSeconds"].to_numpy(dtype=float)[ok]
+    green = (laps["TrackStatus"].astype(str).to_numpy() == "1")[ok]
+    err = predicted - actual
+    return {
+        "lap_abs_err_sum": float(np.abs(err[green]).sum()),
+        "lap_count": int(green.sum()),
+        "total_err": float(err.sum()),
+    }
+
+
+def _run_event(event: str, df: pd.DataFrame, variants: List[str]) -> List[Dict]:
+    # Imports happen in the worker so each process builds its own models
+    import main
+    from strategy_simulator import simulate_race
+
+    track_params = json.loads(TRACK_PARAMS_PATH.read_text())
+    track = EVENT_TO_TRACK.get(event)
+    if track not in track_params:
+        return []
+    meta = track_params[track]
+    track_temp = float(df["TrackTemp"].mean())
+    air_temp = float(df["AirTemp"].mean())
+    rows = []
+
+    for driver, laps in df.groupby("Driver"):
+        laps = laps.sort_values("LapNumber")
+        strategy, pit_laps = actual_strategy(laps)
+        if not strategy:
+            continue
+        total_laps = sum(n for _, n in strategy)
+        row = {"event": event, "track": track, "driver": driver, "laps": total_laps, "results": {}}
+
+        for variant in variants:
+            started = time.perf_counter()
+            if variant == "sim":
+                _, pred = simulate_race(
+                    strategy, meta["avg_lap"], meta["pit_loss"], None, [], [], 5, track_env={"track_temp": track_temp}
+                )
+                score = _score(pred, laps)
+            elif variant.startswith("rf"):
+                trees = int(variant.split(":")[1]) if ":" in variant else 240
+                train = df[(df["Driver"] != driver) & (df["TrackStatus"].astype(str) == "1")]
+                train_laps = train.rename(columns={"StintID": "Stint"})
+                feats = main.engineer_features(train_laps, track_temp, air_temp)
+                feats["LapTimeSeconds"] = train_laps["LapTimeSeconds"].astype(float).values
+                trained = main.train_lap_time_model(feats, n_jobs=1, n_estimators=trees)
+                sim = main.simulate_stint_laps(
+                    trained.pipeline,
+                    compounds=[c for c, _ in strategy],
+                    pit_laps=pit_laps,
+                    total_laps=total_laps,
+                    track_temp=track_temp,
+                    air_temp=air_temp,
+                    fuel_load_kg=float(laps["FuelLoadKgEst"].iloc[0]),
+                )
+                score = _score(sim["predicted_lap_time"].to_numpy(), laps)
+            elif variant == "compare":
+                service = _CsvLapService(laps)
+                req = main.CompareRequest(
+                    year=2025,
+                    event=event,
+                    driver=str(driver),
+                    track_temp_c=track_temp,
+                    air_temp_c=air_temp,
+                    total_laps=min(max(total_laps, 10), 90),
+                )
+                main.compare_strategies(req, service, n_jobs=1)
+                score = {}
+            else:
+                raise ValueError(f"Unknown variant '{variant}'")
+            row["results"][variant] = {**score, "latency_s": time.perf_counter() - started}
+        rows.append(row)
+    return rows
+
+
+class _CsvLapService:
+    """Stands in for FastF1DataService, serving one driver's laps from the CSV."""
+
+    def __init__(self, laps: pd.DataFrame) -> None:
+        self.laps = laps.rename(columns={"StintID": "Stint"})[["LapNumber", "LapTimeSeconds", "Compound", "TyreLife", "Stint"]]
+
+    def load_driver_laps(self, year: int, event: str, session_code: str, driver: str) -> pd.DataFrame:
+        return self.laps.reset_index(drop=True)
+
+
+def summarize(rows: List[Dict], variants: List[str], wall_s: float, workers: int) -> Dict:
+    per_track: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+    overall = {}
+    for variant in variants:
+        by_track: Dict[str, List[Dict]] = defaultdict(list)
+        for row in rows:
+            by_track[row["track"]].append(row["results"][variant])
+        all_results = [r for results in by_track.values() for r in results]
+        if not all_results:
+            overall[variant] = {"groups": 0}
+            continue
+        for track, results in list(by_track.items()) + [("__all__", all_results)]:
+            latencies = np.array([r["latency_s"] for r in results]) * 1000.0
+            stats = {
+                "groups": len(results),
+                "latency_ms_p50": round(float(np.percentile(latencies, 50)), 2),
+                "latency_ms_p95": round(float(np.percentile(latencies, 95)), 2),
+            }
+            if results and "lap_count" in results[0]:
+                laps = sum(r["lap_count"] for r in results)
+                totals = np.array([r["total_err"] for r in results])
+                stats.update(
+                    {
+                        "lap_mae_s": round(sum(r["lap_abs_err_sum"] for r in results) / max(laps, 1), 3),
+                        "total_err_mean_s": round(float(totals.mean()), 2),
+                        "total_abs_err_mean_s": round(float(np.abs(totals).mean()), 2),
+                    }
+                )
+            if track == "__all__":
+                stats["stage_cpu_s"] = round(float(latencies.sum() / 1000.0), 2)
+                overall[variant] = stats
+            else:
+                per_track[track][variant] = stats
+    return {
+        "groups": len(rows),
+        "workers": workers,
+        "wall_s": round(wall_s, 2),
+        "throughput_groups_per_s": round(len(rows) / wall_s, 2) if wall_s else None,
+        "overall": overall,
+        "per_track": dict(sorted(per_track.items())),
+    }
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="Backtest strategy predictors on the 2025 race laps.")
+    parser.add_argument("--variants", default="sim,rf:240,compare", help="comma list of sim, rf[:trees], compare")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--events", default="", help="comma list of EventName filters (substring match)")
+    parser.add_argument("--data", type=Path, default=DATA_PATH)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    df = pd.read_csv(args.data)
+    df = df[df["LapTimeSeconds"].notna()]
+    events = sorted(df["EventName"].unique())
+    if args.events:
+        wanted = [e.strip().lower() for e in args.events.split(",")]
+        events = [e for e in events if any(w in e.lower() for w in wanted)]
+    skipped = [e for e in events if EVENT_TO_TRACK.get(e) is None]
+
+    started = time.perf_counter()
+    rows: List[Dict] = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(_run_event, e, df[df["EventName"] == e], variants) for e in events if e not in skipped]
+        for future in futures:
+            rows.extend(future.result())
+    report = summarize(rows, variants, time.perf_counter() - started, args.workers)
+    report["skipped_events"] = skipped
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main_cli()
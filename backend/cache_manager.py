@@ -0,0 +1,354 @@
+"""Bounded on-disk cache manager for .fastf1_cache and derived artifacts.
+
+An entry is a leaf directory (FastF1 keeps one per session) or a loose file
+next to sub-directories (e.g. FastF1's HTTP sqlite cache). Access counts and
+recency are kept in ``.cache_index.json`` inside the cache root; entries are
+evicted LRU or LFU until the tree fits the byte budget. FastF1's HTTP cache
+(``fastf1_http_cache.sqlite``) counts against the budget like everything else;
+callers pin it only while FastF1 holds it open, and when evicted it goes
+together with its journal files. Index updates take an ``flock`` on
+``.cache_index.lock`` so several workers sharing a cache do not drop each
+other's counts. ``verify`` finds half-written entries (truncated pickles,
+corrupt sqlite, stale temp files, artifact manifests pointing past the end of
+data.bin) and can remove them. The quick check used at service start only
+reads file tails and headers; ``deep=True``, the CLI default, unpickles every
+pickle and runs sqlite's quick_check.
+
+CLI (works offline against any local directory)::
+
+    python cache_manager.py stats   [--root DIR]
+    python cache_manager.py inspect [--root DIR] [--top N]
+    python cache_manager.py verify  [--root DIR] [--repair] [--quick]
+    python cache_manager.py evict   [--root DIR] [--budget-mb N] [--policy lru|lfu] [--keep-http-cache]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Literal, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: thread lock only
+    fcntl = None
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".fastf1_cache"
+INDEX_NAME = ".cache_index.json"
+LOCK_NAME = ".cache_index.lock"
+DEFAULT_BUDGET_MB = int(os.environ.get("F1_CACHE_BUDGET_MB", "2048"))
+STALE_TMP_S = 15 * 60
+PICKLE_SUFFIXES = {".pkl", ".ff1pkl", ".pickle"}
+HTTP_CACHE = ("fastf1_http_cache.sqlite",)  # plus its -journal/-wal/-shm siblings
+PICKLE_STOP = b"."
+SQLITE_HEADER = b"SQLite format 3\0"
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    path: Path
+    size: int
+    mtime: float
+    last_access: float
+    hits: int
+
+
+def _tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _tree_mtime(path: Path) -> float:
+    if path.is_file():
+        return path.stat().st_mtime
+    return max([p.stat().st_mtime for p in path.rglob("*") if p.is_file()] or [path.stat().st_mtime])
+
+
+class CacheManager:
+    def __init__(
+        self,
+        root: Path = CACHE_DIR,
+        budget_bytes: int = DEFAULT_BUDGET_MB * 1024 * 1024,
+        policy: Literal["lru", "lfu"] = "lru",
+    ) -> None:
+        self.root = Path(root)
+        self.budget_bytes = budget_bytes
+        self.policy = policy
+        self._lock = threading.Lock()
+
+    # ---------- index ----------
+    def _index_path(self) -> Path:
+        return self.root / INDEX_NAME
+
+    def _read_index(self) -> Dict:
+        try:
+            return json.loads(self._index_path().read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"entries": {}, "hits": 0, "misses": 0}
+
+    @contextmanager
+    def _index_lock(self) -> Iterator[None]:
+        """Serialize index read-modify-writes across threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with (self.root / LOCK_NAME).open("a") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_index(self, index: Dict) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".cache_index-{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+        tmp.write_text(json.dumps(index))
+        os.replace(tmp, self._index_path())
+
+    def record(self, key: str, hit: bool) -> None:
+        """Count a lookup of ``key`` (a path relative to the root)."""
+        with self._index_lock():
+            index = self._read_index()
+            meta = index["entries"].setdefault(key, {"hits": 0, "last_access": 0.0})
+            meta["last_access"] = time.time()
+            if hit:
+                meta["hits"] += 1
+                index["hits"] += 1
+            else:
+                index["misses"] += 1
+            self._write_index(index)
+
+    # ---------- scanning ----------
+    def entries(self) -> List[CacheEntry]:
+        if not self.root.is_dir():
+            return []
+        index = self._read_index()["entries"]
+        found: List[CacheEntry] = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            here = Path(dirpath)
+            files = [f for f in filenames if f not in (INDEX_NAME, LOCK_NAME) and not (here == self.root and f.startswith(".cache_index-"))]
+            if here != self.root and not dirnames:
+                paths = [here] if files else []
+            else:
+                paths = [here / f for f in files]
+            for path in paths:
+                key = path.relative_to(self.root).as_posix()
+                mtime = _tree_mtime(path)
+                meta = index.get(key, {})
+                found.append(
+                    CacheEntry(
+                        key=key,
+                        path=path,
+                        size=_tree_size(path),
+                        mtime=mtime,
+                        last_access=max(mtime, meta.get("last_access", 0.0)),
+                        hits=int(meta.get("hits", 0)),
+                    )
+                )
+        return found
+
+    # ---------- eviction ----------
+    def enforce_budget(self, pinned: Iterable[str] = ()) -> List[str]:
+        """Evict entries until the cache fits the budget; returns evicted keys.
+
+        Keys starting with a ``pinned`` prefix are kept (pass ``HTTP_CACHE``
+        while FastF1 has its sqlite open) but still count towards the total,
+        and a warning is printed if they alone keep the cache over budget.
+        """
+        pinned = tuple(pinned)
+        with self._index_lock():
+            entries = self.entries()
+            total = sum(e.size for e in entries)
+            if total <= self.budget_bytes:
+                return []
+            candidates = [e for e in entries if not (pinned and e.key.startswith(pinned))]
+            if self.policy == "lfu":
+                candidates.sort(key=lambda e: (e.hits, e.last_access))
+            else:
+                candidates.sort(key=lambda e: e.last_access)
+            index = self._read_index()
+            evicted: List[str] = []
+            for entry in candidates:
+                if total <= self.budget_bytes:
+                    break
+                if entry.key in evicted:
+                    continue
+                group = [entry]
+                if entry.key.startswith(HTTP_CACHE):
+                    # A journal left behind would be replayed into the next, fresh database
+                    name = next(n for n in HTTP_CACHE if entry.key.startswith(n))
+                    group = [e for e in entries if e.key.startswith(name)]
+                for member in group:
+                    self._remove(member.path)
+                    index["entries"].pop(member.key, None)
+                    total -= member.size
+                    evicted.append(member.key)
+            self._write_index(index)
+            if total > self.budget_bytes:
+                print(
+                    f"[WARN] {self.root} is {total / 2**20:.0f} MB after eviction, over its "
+                    f"{self.budget_bytes / 2**20:.0f} MB budget; pinned: {', '.join(pinned)}"
+                )
+            return evicted
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+    # ---------- integrity ----------
+    @staticmethod
+    def _file_problem(path: Path, now: float, deep: bool = False) -> Optional[str]:
+        name = path.name
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if (".tmp" in name or name.startswith(".tmp-")) and now - st.st_mtime > STALE_TMP_S:
+            return "stale temp file"
+        if st.st_size == 0:
+            return "empty file"
+        if path.suffix in PICKLE_SUFFIXES and not deep:
+            # Every pickle ends with the STOP opcode; a truncated write does not
+            with path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != PICKLE_STOP:
+                    return "truncated pickle"
+        elif path.suffix in PICKLE_SUFFIXES:
+            try:
+                with path.open("rb") as f:
+                    pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                return "truncated pickle"
+            except Exception:
+                # Unpickling may need packages that are not installed; not an integrity issue
+                return None
+        if path.suffix == ".sqlite" and not deep:
+            with path.open("rb") as f:
+                if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+                    return "corrupt sqlite"
+        elif path.suffix == ".sqlite":
+            try:
+                with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+                    if conn.execute("PRAGMA quick_check").fetchone()[0] != "ok":
+                        return "corrupt sqlite"
+            except sqlite3.DatabaseError:
+                return "corrupt sqlite"
+        if name == "manifest.json":
+            try:
+                manifest = json.loads(path.read_text())
+                data = path.parent / "data.bin"
+                size = data.stat().st_size if data.exists() else 0
+                for spec in manifest.get("arrays", {}).values():
+                    count = 1
+                    for dim in spec["shape"]:
+                        count *= dim
+                    if spec["offset"] + count * np.dtype(spec["dtype"]).itemsize > size:
+                        return "artifact data.bin shorter than manifest"
+            except (json.JSONDecodeError, KeyError, TypeError):
+                return "unreadable artifact manifest"
+        return None
+
+    def verify(self, repair: bool = False, deep: bool = False) -> List[Dict[str, str]]:
+        """List half-written entries; with ``repair`` remove them. ``deep`` loads every file."""
+        problems = []
+        now = time.time()
+        for entry in self.entries():
+            files = [entry.path] if entry.path.is_file() else [p for p in entry.path.rglob("*") if p.is_file()]
+            for path in files:
+                reason = self._file_problem(path, now, deep=deep)
+                if reason:
+                    problems.append({"entry": entry.key, "file": path.relative_to(self.root).as_posix(), "reason": reason})
+                    break
+        if repair and problems:
+            with self._index_lock():
+                index = self._read_index()
+                for problem in problems:
+                    self._remove(self.root / problem["entry"])
+                    index["entries"].pop(problem["entry"], None)
+                self._write_index(index)
+        return problems
+
+    # ---------- reporting ----------
+    def stats(self) -> Dict[str, float | int | str | None]:
+        entries = self.entries()
+        index = self._read_index()
+        now = time.time()
+        lookups = index["hits"] + index["misses"]
+        ages = [now - e.mtime for e in entries]
+        total = sum(e.size for e in entries)
+        return {
+            "root": str(self.root),
+            "policy": self.policy,
+            "entries": len(entries),
+            "size_bytes": total,
+            "budget_bytes": self.budget_bytes,
+            "utilization": round(total / self.budget_bytes, 4) if self.budget_bytes else None,
+            "hits": index["hits"],
+            "misses": index["misses"],
+            "hit_rate": round(index["hits"] / lookups, 4) if lookups else None,
+            "oldest_age_s": round(max(ages), 1) if ages else None,
+            "newest_age_s": round(min(ages), 1) if ages else None,
+            "mean_age_s": round(sum(ages) / len(ages), 1) if ages else None,
+        }
+
+    def inspect(self, top: int = 20) -> List[Dict[str, float | int | str]]:
+        now = time.time()
+        entries = sorted(self.entries(), key=lambda e: e.size, reverse=True)[:top]
+        return [
+            {
+                "key": e.key,
+                "size_bytes": e.size,
+                "hits": e.hits,
+                "age_s": round(now - e.mtime, 1),
+                "idle_s": round(now - e.last_access, 1),
+            }
+            for e in entries
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Inspect and bound an on-disk cache directory.")
+    parser.add_argument("command", choices=["stats", "inspect", "verify", "evict"])
+    parser.add_argument("--root", type=Path, default=CACHE_DIR)
+    parser.add_argument("--budget-mb", type=int, default=DEFAULT_BUDGET_MB)
+    parser.add_argument("--policy", choices=["lru", "lfu"], default="lru")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repair", action="store_true", help="remove half-written entries found by verify")
+    parser.add_argument("--quick", action="store_true", help="verify file tails/headers only, as at service start")
+    parser.add_argument("--keep-http-cache", action="store_true", help="do not evict FastF1's HTTP sqlite (if a service has it open)")
+    args = parser.parse_args()
+
+    manager = CacheManager(args.root, budget_bytes=args.budget_mb * 1024 * 1024, policy=args.policy)
+    if args.command == "stats":
+        out = manager.stats()
+    elif args.command == "inspect":
+        out = manager.inspect(top=args.top)
+    elif args.command == "verify":
+        out = manager.verify(repair=args.repair, deep=not args.quick)
+    else:
+        pinned = HTTP_CACHE if args.keep_http_cache else ()
+        out = {"evicted": manager.enforce_budget(pinned=pinned), **manager.stats()}
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Scriptable rebuild of data/strategy_2025_race_only.csv from FastF1.
+
+Replaces the fetch/derive cells of notebooks/data_retrieval_2025.ipynb. Each
+race is loaded and turned into rows in its own worker process (one event per
+process, so memory stays flat however long the season is) and written to a
+part file under ``.pipeline/<season>/``. The output CSV is then assembled by
+streaming the parts in EventName order, as the notebook export sorted them.
+
+A manifest records, per event, a fingerprint of its FastF1 cache directory
+and the pipeline version. On a re-run only events that are new, whose cached
+session data changed, or whose part is missing are rebuilt; an event whose
+cache was evicted keeps its part (use ``--force`` to refetch everything).
+
+Derived columns match the notebook's ``lap_to_row`` and stint assignment:
+linear fuel burn, ``FuelCorrection``, ``ThermalDegProxy``, ``MechWearProxy``,
+``LapFrac`` and ``StintID`` (compound changes per driver).
+
+    python feature_pipeline.py --season 2025 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fastf1  # type: ignore
+except Exception:  # pragma: no cover
+    fastf1 = None
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".fastf1_cache"
+WORK_DIR = BASE_DIR / ".pipeline"
+OUTPUT_PATH = BASE_DIR / "data" / "strategy_2025_race_only.csv"
+
+# Bump when the derivation below changes so every part is rebuilt
+PIPELINE_VERSION = "1"
+START_FUEL_KG = 100.0
+BURN_PER_LAP = 1.7
+
+COLUMNS = [
+    "Season",
+    "EventName",
+    "Driver",
+    "LapNumber",
+    "TotalLaps",
+    "TyreLife",
+    "Compound",
+    "TrackStatus",
+    "StintID",
+    "LapTimeSeconds",
+    "FuelLoadKgEst",
+    "FuelCorrection",
+    "AirTemp",
+    "TrackTemp",
+    "ThermalDegProxy",
+    "MechWearProxy",
+    "LapFrac",
+]
+
+
+def derive_features(
+    laps: pd.DataFrame,
+    season: int,
+    event_name: str,
+    air_temp: float,
+    track_temp: float,
+) -> pd.DataFrame:
+    """Output rows for one race from valid FastF1 laps (LapTime/PitIn/PitOut already filtered)."""
+    lap_no = laps["LapNumber"].astype(int).to_numpy()
+    total_laps = int(lap_no.max())
+    total = max(total_laps, 1)
+    tyre_life = laps["TyreLife"].to_numpy(dtype=float)
+    tyre_life_safe = np.where(np.isnan(tyre_life), 1.0, tyre_life)
+    fuel_kg = np.maximum(0.0, START_FUEL_KG - (lap_no - 1) * BURN_PER_LAP)
+
+    out = pd.DataFrame(
+        {
+            "Season": season,
+            "EventName": event_name,
+            "Driver": laps["Driver"].to_numpy(),
+            "LapNumber": lap_no,
+            "TotalLaps": total_laps,
+            "TyreLife": tyre_life,
+            "Compound": laps["Compound"].fillna("").astype(str).str.upper().replace("", "UNKNOWN").to_numpy(),
+            "TrackStatus": laps["TrackStatus"].to_numpy(),
+            "LapTimeSeconds": laps["LapTime"].dt.total_seconds().to_numpy(),
+            "FuelLoadKgEst": fuel_kg,
+            "FuelCorrection": -0.03 * fuel_kg,
+            "AirTemp": air_temp,
+            "TrackTemp": track_temp,
+            "ThermalDegProxy": tyre_life_safe * (track_temp / 35.0),
+            "MechWearProxy": tyre_life_safe * (1.0 + (lap_no / total) * 0.15),
+            "LapFrac": lap_no / total,
+        }
+    )
+    out = out.sort_values(["Driver", "LapNumber"], kind="stable").reset_index(drop=True)
+    compound = out["Compound"]
+    changed = compound.ne(compound.groupby(out["Driver"]).shift())
+    out["StintID"] = changed.astype(int).groupby(out["Driver"]).cumsum()
+    return out[COLUMNS]
+
+
+def session_fingerprint(cache_dir: Path, api_path: str) -> Optional[str]:
+    """Hash of the cached files for one session, or None if nothing is cached."""
+    session_dir = cache_dir / api_path.replace("/static/", "", 1).strip("/")
+    if not session_dir.is_dir():
+        return None
+    digest = hashlib.sha1()
+    for path in sorted(p for p in session_dir.rglob("*") if p.is_file()):
+        st = path.stat()
+        digest.update(f"{path.relative_to(session_dir).as_posix()}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _part_name(event_name: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in event_name.lower()).strip("_") + ".csv"
+
+
+def _build_event(season: int, event_name: str, cache_dir: Path, part_path: Path) -> Dict:
+    """Worker: load one race, derive its rows and write them to ``part_path``."""
+    fastf1.Cache.enable_cache(str(cache_dir))
+    sess = fastf1.get_session(season, event_name, "R")
+    sess.load(laps=True, telemetry=False, weather=True)
+
+    wx = getattr(sess, "weather_data", None)
+    wx = wx if wx is not None else pd.DataFrame()
+    air_temp = float(wx["AirTemp"].mean()) if "AirTemp" in wx.columns else np.nan
+    track_temp = float(wx["TrackTemp"].mean()) if "TrackTemp" in wx.columns else np.nan
+
+    laps = sess.laps
+    laps = laps[laps["LapTime"].notna() & laps["PitOutTime"].isna() & laps["PitInTime"].isna() & laps["LapNumber"].notna()]
+    rows = derive_features(laps, season, event_name, air_temp, track_temp) if not laps.empty else pd.DataFrame(columns=COLUMNS)
+
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = part_path.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+    rows.to_csv(tmp, index=False)
+    os.replace(tmp, part_path)
+    return {"rows": len(rows), "fingerprint": session_fingerprint(cache_dir, sess.api_path)}
+
+
+def completed_events(season: int) -> List[Tuple[str, str]]:
+    """(EventName, session api_path) for every race of ``season`` already run."""
+    schedule = fastf1.get_event_schedule(season, include_testing=False)
+    schedule = schedule[schedule["Session5"].notna()].copy()
+    schedule["EventDate"] = pd.to_datetime(schedule["EventDate"], utc=True)
+    completed = schedule[schedule["EventDate"] <= pd.Timestamp.now(tz="UTC")]
+    events = []
+    for name in completed["EventName"]:
+        sess = fastf1.get_session(season, name, "R")
+        events.append((str(name), str(sess.api_path)))
+    return events
+
+
+class FeaturePipeline:
+    def __init__(self, season: int, cache_dir: Path = CACHE_DIR, work_dir: Path = WORK_DIR) -> None:
+        self.season = season
+        self.cache_dir = Path(cache_dir)
+        self.parts_dir = Path(work_dir) / str(season)
+        self.manifest_path = self.parts_dir / "manifest.json"
+
+    def _read_manifest(self) -> Dict:
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": PIPELINE_VERSION, "events": {}}
+        if manifest.get("version") != PIPELINE_VERSION:
+            return {"version": PIPELINE_VERSION, "events": {}}
+        return manifest
+
+    def _write_manifest(self, manifest: Dict) -> None:
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.parts_dir / f".manifest-{uuid.uuid4().hex[:8]}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.manifest_path)
+
+    def stale_events(self, events: List[Tuple[str, str]], manifest: Dict, force: bool = False) -> List[str]:
+        stale = []
+        for name, api_path in events:
+            meta = manifest["events"].get(name)
+            part = self.parts_dir / _part_name(name)
+            if force or meta is None or not part.exists():
+                stale.append(name)
+                continue
+            current = session_fingerprint(self.cache_dir, api_path)
+            # An evicted cache entry is not a change; the part is still valid
+            if current is not None and current != meta["fingerprint"]:
+                stale.append(name)
+        return stale
+
+    def run(self, output: Path = OUTPUT_PATH, workers: Optional[int] = None, force: bool = False) -> Dict:
+        if fastf1 is None:
+            raise RuntimeError("fastf1 is required to build the feature CSV")
+        fastf1.Cache.enable_cache(str(self.cache_dir))
+        started = time.perf_counter()
+        events = completed_events(self.season)
+        manifest = self._read_manifest()
+        stale = self.stale_events(events, manifest, force=force)
+
+        built, failed = [], {}
+        if stale:
+            # One task per child so a worker's FastF1 session memory is released after each race
+            with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+                futures = {
+                    pool.submit(_build_event, self.season, name, self.cache_dir, self.parts_dir / _part_name(name)): name
+                    for name in stale
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        tag = "[RATE LIMIT]" if ("429" in str(exc) or "RateLimitExceeded" in str(exc)) else "[WARN]"
+                        print(f"{tag} {name}: {exc}")
+                        failed[name] = str(exc)
+                        continue
+                    manifest["events"][name] = {"part": _part_name(name), "built_at": time.time(), **result}
+                    self._write_manifest(manifest)
+                    built.append(name)
+                    print(f"  [OK] {name}: {result['rows']} rows")
+
+        rows = self.assemble([name for name, _ in events], manifest, output)
+        return {
+            "season": self.season,
+            "events": len(events),
+            "rebuilt": sorted(built),
+            "reused": len(events) - len(stale),
+            "failed": failed,
+            "rows": rows,
+            "output": str(output),
+            "wall_s": round(time.perf_counter() - started, 2),
+        }
+
+    def assemble(self, event_names: List[str], manifest: Dict, output: Path) -> int:
+        """Stream the part files, in EventName order, into ``output``."""
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp = output.with_suffix(f".{uuid.uuid4().hex[:8]}.tmp")
+        rows = 0
+        with tmp.open("w", newline="") as out:
+            out.write(",".join(COLUMNS) + "\n")
+            for name in sorted(event_names):
+                part = self.parts_dir / _part_name(name)
+                if name not in manifest["events"] or not part.exists():
+                    continue
+                with part.open(newline="") as f:
+                    f.readline()  # header
+                    shutil.copyfileobj(f, out)
+                rows += int(manifest["events"][name]["rows"])
+        os.replace(tmp, output)
+        return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the per-lap strategy feature CSV from FastF1, one race per process.")
+    parser.add_argument("--season", type=int, default=2025)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--work-dir", type=Path, default=WORK_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild every event")
+    args = parser.parse_args()
+
+    pipeline = FeaturePipeline(args.season, cache_dir=args.cache_dir, work_dir=args.work_dir)
+    print(json.dumps(pipeline.run(args.out, workers=args.workers, force=args.force), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Vectorized Monte Carlo simulation of the whole field.
+
+Every car runs its own strategy through ``simulate_stint`` once to get a
+clean-air lap profile. The race is then replayed lap by lap for many Monte
+Carlo samples at once, with state arrays shaped (sims, cars): running order,
+gaps, dirty-air penalties, blocking by slower cars and the positions won or
+lost through each pit stop.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from strategy_simulator import simulate_stint
+
+BASE_DIR = Path(__file__).resolve().parent
+PACE_FEATURES_PATH = BASE_DIR / "Excelfiles" / "hybrid_pace_features.csv"
+
+MAX_CARS = 20
+START_GAP = 0.25  # seconds between grid slots after lap 1
+LAP_SIGMA = 0.25  # per-lap noise
+PIT_SIGMA = 0.6  # pit stop execution noise
+DIRTY_AIR_WINDOW = 1.5  # gap (s) below which the following car loses time
+DIRTY_AIR_PEN = 0.45  # penalty at zero gap, fading linearly to 0 at the window
+PASS_MARGIN = 0.6  # pace advantage needed on a lap to complete an overtake
+MIN_GAP = 0.2  # a held-up car crosses the line this far behind the car ahead
+PACE_PER_POSITION = 0.06  # s/lap per place of average finishing position
+
+# track_params.json keys -> Ergast circuitId used in hybrid_pace_features.csv
+TRACK_TO_CIRCUIT = {
+    "Abu Dhabi": 24,
+    "Austin": 69,
+    "Australia": 1,
+    "Austria": 70,
+    "Bahrain": 3,
+    "Belgium": 13,
+    "Brazil": 18,
+    "Canada": 7,
+    "China": 17,
+    "Hungary": 11,
+    "Imola": 21,
+    "Japan": 22,
+    "Jeddah": 77,
+    "Las Vegas": 80,
+    "Mexico": 32,
+    "Miami": 79,
+    "Monaco": 6,
+    "Monza": 14,
+    "Netherlands": 39,
+    "Qatar": 78,
+    "Silverstone": 9,
+    "Singapore": 15,
+    "Spain": 4,
+}
+
+_pace_features: Optional[pd.DataFrame] = None
+
+
+def _load_pace_features() -> pd.DataFrame:
+    global _pace_features
+    if _pace_features is None:
+        _pace_features = pd.read_csv(PACE_FEATURES_PATH)
+    return _pace_features
+
+
+def field_entry_list(race_id: Optional[int] = None, circuit_id: Optional[int] = None) -> pd.DataFrame:
+    """Grid for one race from hybrid_pace_features.csv with a per-driver pace offset (s/lap).
+
+    Defaults to the latest race, or the latest race at ``circuit_id``. A
+    ``race_id`` held at a different circuit than ``circuit_id`` is rejected.
+    """
+    df = _load_pace_features()
+    pool = df[df["circuitId"] == circuit_id] if circuit_id is not None else df
+    if pool.empty:
+        raise ValueError(f"No races at circuitId {circuit_id}")
+    if race_id is None:
+        race_id = int(pool["raceId"].max())
+    field = pool[pool["raceId"] == race_id].copy()
+    if field.empty:
+        raise ValueError(f"Unknown raceId {race_id}" + (f" at circuitId {circuit_id}" if circuit_id is not None else ""))
+
+    # Pit-lane starters (grid 0) go to the back
+    field["grid"] = field["grid"].where(field["grid"] > 0, 99)
+    field = field.sort_values("grid").head(MAX_CARS).reset_index(drop=True)
+    score = 0.7 * field["driver_strength_season"] + 0.3 * field["driver_track_form"]
+    field["pace_offset"] = PACE_PER_POSITION * (score - score.min())
+    return field[["driverId", "code", "team_name", "race_name", "circuitId", "grid", "pace_offset"]]
+
+
+def default_field_strategy(idx: int, total_laps: int) -> List[Tuple[str, int]]:
+    # Alternate an early soft stop and a long medium first stint so undercuts show up
+    if idx % 2 == 0:
+        first = int(total_laps * 0.40)
+        return [("MEDIUM", first), ("HARD", total_laps - first)]
+    first = int(total_laps * 0.28)
+    return [("SOFT", first), ("HARD", total_laps - first)]
+
+
+def clean_air_profile(strategy: Sequence[Tuple[str, int]], base_lap: float, track_env: Optional[Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-lap clean-air times and a boolean mask of in-laps (pit at the end of that lap)."""
+    laps: List[np.ndarray] = []
+    in_laps: List[np.ndarray] = []
+    for idx, (compound, stint_laps) in enumerate(strategy):
+        laps.append(simulate_stint(compound, int(stint_laps), base_lap, None, [], [], 0, track_env))
+        pit = np.zeros(int(stint_laps), dtype=bool)
+        if idx < len(strategy) - 1 and stint_laps > 0:
+            pit[-1] = True
+        in_laps.append(pit)
+    return np.concatenate(laps), np.concatenate(in_laps)
+
+
+def simulate_field(
+    strategies: Sequence[Sequence[Tuple[str, int]]],
+    pace_offsets: np.ndarray,
+    base_lap: float,
+    pit_loss: float,
+    n_sims: int = 1000,
+    track_env: Optional[Dict[str, float]] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Run ``n_sims`` races; cars are given in grid order.
+
+    Returns arrays shaped (sims, cars) unless noted.
+    """
+    n_cars = len(strategies)
+    profiles = [clean_air_profile(s, base_lap, track_env) for s in strategies]
+    lengths = {len(p[0]) for p in profiles}
+    if len(lengths) != 1:
+        raise ValueError(f"Strategies cover different race distances: {sorted(lengths)} laps")
+    total_laps = lengths.pop()
+    clean = np.stack([p[0] for p in profiles]) + np.asarray(pace_offsets, dtype=float)[:, None]  # (C, L)
+    in_lap = np.stack([p[1] for p in profiles])  # (C, L)
+
+    rng = np.random.default_rng(seed)
+    sims = np.arange(n_sims)[:, None]
+    t = np.broadcast_to(np.arange(n_cars) * START_GAP, (n_sims, n_cars)).copy()
+    position = np.broadcast_to(np.arange(n_cars), (n_sims, n_cars)).copy()
+    traffic_loss = np.zeros((n_sims, n_cars))
+    pit_position_change = np.zeros((n_sims, n_cars))
+    positions_by_lap = np.empty((total_laps, n_sims, n_cars), dtype=np.int8)
+
+    for lap in range(total_laps):
+        order = np.argsort(t, axis=1)  # car index per running position
+        t_sorted = np.take_along_axis(t, order, axis=1)
+        gap_ahead = np.full((n_sims, n_cars), np.inf)
+        gap_ahead[:, 1:] = np.diff(t_sorted, axis=1)
+
+        pitting = np.take_along_axis(np.broadcast_to(in_lap[:, lap], (n_sims, n_cars)), order, axis=1)
+        dirty = DIRTY_AIR_PEN * np.clip(1.0 - gap_ahead / DIRTY_AIR_WINDOW, 0.0, 1.0)
+        dirty[pitting] = 0.0
+
+        lap_time = np.take_along_axis(np.broadcast_to(clean[:, lap], (n_sims, n_cars)), order, axis=1)
+        lap_time = lap_time + rng.normal(0.0, LAP_SIGMA, size=(n_sims, n_cars)) + dirty
+        lap_time = lap_time + pitting * (pit_loss + rng.normal(0.0, PIT_SIGMA, size=(n_sims, n_cars)))
+        proposed = t_sorted + lap_time
+
+        # Blocking walks the running order; each step is vectorized over sims
+        held_loss = np.zeros((n_sims, n_cars))
+        for p in range(1, n_cars):
+            ahead = proposed[:, p - 1]
+            me = proposed[:, p]
+            free = pitting[:, p] | pitting[:, p - 1] | (me < ahead - PASS_MARGIN)
+            held = ~free & (me < ahead + MIN_GAP)
+            held_loss[:, p] = np.where(held, ahead + MIN_GAP - me, 0.0)
+            proposed[:, p] = np.where(held, ahead + MIN_GAP, me)
+
+        t[sims, order] = proposed
+        traffic_loss[sims, order] += dirty + held_loss
+
+        new_position = np.empty_like(position)
+        new_position[sims, np.argsort(t, axis=1)] = np.arange(n_cars)
+        # Net places gained (+) or lost (-) across the in-lap and the out-lap that follows
+        if lap > 0:
+            out_lap = in_lap[:, lap - 1][None, :]
+            pit_position_change += np.where(out_lap, position - new_position, 0)
+        pit_position_change += np.where(in_lap[:, lap][None, :], position - new_position, 0)
+        position = new_position
+        positions_by_lap[lap] = position
+
+    return {
+        "total_time": t,
+        "finish_position": position + 1,
+        "traffic_loss": traffic_loss,
+        "pit_position_change": pit_position_change,
+        "positions_by_lap": positions_by_lap,  # (laps, sims, cars), 0-based
+    }
+
+
+def summarize_field(entries: pd.DataFrame, strategies: Sequence[Sequence[Tuple[str, int]]], result: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    finish = result["finish_position"]
+    out = []
+    for c, row in entries.iterrows():
+        out.append(
+            {
+                "code": row["code"],
+                "team": row["team_name"],
+                "grid": int(row["grid"]),
+                "pace_offset": round(float(row["pace_offset"]), 3),
+                "strategy": [(comp, int(n)) for comp, n in strategies[c]],
+                "mean_finish": round(float(finish[:, c].mean()), 2),
+                "p10_finish": int(np.percentile(finish[:, c], 10)),
+                "p90_finish": int(np.percentile(finish[:, c], 90)),
+                "win_prob": round(float((finish[:, c] == 1).mean()), 4),
+                "podium_prob": round(float((finish[:, c] <= 3).mean()), 4),
+                "mean_total_time": round(float(result["total_time"][:, c].mean()), 3),
+                "mean_traffic_loss": round(float(result["traffic_loss"][:, c].mean()), 3),
+                "mean_pit_position_change": round(float(result["pit_position_change"][:, c].mean()), 2),
+            }
+        )
+    return out
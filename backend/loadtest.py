@@ -0,0 +1,316 @@
+"""Local load generator for the two FastAPI apps.
+
+Starts app.py and main.py under uvicorn (main.py with ``F1_OFFLINE=1`` so
+``/strategy/compare`` runs on ``synthetic_laps`` and needs no network), then
+replays a weighted mix of /predict_strategy, /suggest_strategy and
+/strategy/compare requests in one of two modes:
+
+- ``--concurrency N``: N closed-loop clients, each sending its next request
+  as soon as the previous one returns;
+- ``--rate R``: an open-loop schedule of R requests/s (``--poisson`` for
+  exponential gaps). Latency is measured from the scheduled send time, so
+  client-side queueing behind a saturated server is counted.
+
+The report (JSON) has throughput, p50/p95/p99 latency and error rates
+overall and per endpoint. Requests answered with a 4xx/5xx status, an
+``{"error": ...}`` body or a transport failure count as errors; 429s from the
+scheduler are also broken out.
+
+    python loadtest.py --concurrency 50 --duration 30 --mix predict=6,suggest=2,compare=2 --out run.json
+    python loadtest.py --rate 40 --poisson --duration 30 --no-start
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent
+
+TRACKS = ["Bahrain", "Monaco", "Monza", "Silverstone", "Japan", "Singapore"]
+STRATEGIES = [
+    [["SOFT", 15], ["HARD", 42]],
+    [["MEDIUM", 25], ["HARD", 32]],
+    [["SOFT", 12], ["MEDIUM", 20], ["HARD", 25]],
+]
+DRIVERS = ["VER", "NOR", "LEC", "HAM", "PIA", "RUS"]
+
+# endpoint name -> (server, path); every endpoint is a POST
+ENDPOINTS = {
+    "predict": ("app", "/predict_strategy"),
+    "suggest": ("app", "/suggest_strategy"),
+    "compare": ("main", "/strategy/compare"),
+}
+
+
+def _payload(name: str, rng: random.Random) -> Dict:
+    if name == "predict":
+        return {
+            "track": rng.choice(TRACKS),
+            "strategy": rng.choice(STRATEGIES),
+            "track_env": {"track_temp": rng.uniform(20.0, 50.0)},
+        }
+    if name == "suggest":
+        return {"track": rng.choice(TRACKS), "base_lap_time": rng.uniform(85.0, 100.0), "pit_loss": rng.uniform(18.0, 26.0)}
+    return {
+        "driver": rng.choice(DRIVERS),
+        "track_temp_c": rng.uniform(20.0, 50.0),
+        "air_temp_c": rng.uniform(15.0, 35.0),
+        "total_laps": rng.choice([53, 57, 70, 78]),
+    }
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    started: float  # intended send time (perf_counter)
+    latency_s: float
+    status: int  # 0 for transport failures
+    error: bool
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' (expected one of {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class ServerProcess:
+    """One uvicorn child process, stopped on exit."""
+
+    def __init__(self, module: str, port: int, env: Optional[Dict[str, str]] = None, log_path: Optional[Path] = None) -> None:
+        self.url = f"http://127.0.0.1:{port}"
+        self._log = open(log_path, "w") if log_path else subprocess.DEVNULL
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{module}:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=BASE_DIR,
+            env={**os.environ, **(env or {})},
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+
+    def wait_ready(self, timeout: float = 120.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"{self.url} exited with code {self.proc.returncode}")
+            try:
+                if requests.get(f"{self.url}/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.25)
+        raise TimeoutError(f"{self.url} not ready after {timeout:.0f}s")
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        if self._log is not subprocess.DEVNULL:
+            self._log.close()
+
+
+class LoadGenerator:
+    def __init__(self, urls: Dict[str, str], mix: Dict[str, float], timeout: float = 30.0, seed: int = 0) -> None:
+        self.urls = urls
+        self.names = list(mix)
+        self.weights = [mix[n] for n in self.names]
+        self.timeout = timeout
+        self.seed = seed
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.samples: List[Sample] = []
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def send(self, name: str, rng: random.Random, scheduled: Optional[float] = None) -> Sample:
+        server, path = ENDPOINTS[name]
+        started = scheduled if scheduled is not None else time.perf_counter()
+        status, error = 0, True
+        try:
+            r = self._session().post(f"{self.urls[server]}{path}", json=_payload(name, rng), timeout=self.timeout)
+            status = r.status_code
+            error = status >= 400
+            if not error and r.headers.get("content-type", "").startswith("application/json"):
+                body = r.json()
+                error = isinstance(body, dict) and "error" in body
+        except (requests.RequestException, ValueError):
+            pass
+        sample = Sample(name, started, time.perf_counter() - started, status, error)
+        with self._lock:
+            self.samples.append(sample)
+        return sample
+
+    def warmup(self) -> None:
+        # First calls load models and build caches; keep them out of the measurement
+        rng = random.Random(self.seed)
+        for name in self.names:
+            self.send(name, rng)
+        self.samples.clear()
+
+    def run_concurrency(self, clients: int, duration_s: float) -> float:
+        deadline = time.perf_counter() + duration_s
+
+        def client(i: int) -> None:
+            rng = random.Random(self.seed + i)
+            while time.perf_counter() < deadline:
+                self.send(rng.choices(self.names, self.weights)[0], rng)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(client, range(clients)))
+        return time.perf_counter() - started
+
+    def run_rate(self, rate: float, duration_s: float, poisson: bool = False, max_in_flight: int = 512) -> float:
+        rng = random.Random(self.seed)
+        started = time.perf_counter()
+        next_at = started
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            i = 0
+            while next_at < started + duration_s:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                req_rng = random.Random(self.seed * 1_000_003 + i)
+                pool.submit(self.send, rng.choices(self.names, self.weights)[0], req_rng, next_at)
+                next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+                i += 1
+        return time.perf_counter() - started
+
+
+def _latency_stats(samples: List[Sample], wall_s: float) -> Dict:
+    if not samples:
+        return {"requests": 0}
+    ms = np.array([s.latency_s for s in samples]) * 1000.0
+    errors = sum(s.error for s in samples)
+    statuses: Dict[str, int] = defaultdict(int)
+    for s in samples:
+        statuses[str(s.status) if s.status else "transport_error"] += 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / wall_s, 2) if wall_s else None,
+        "ok_rps": round((len(samples) - errors) / wall_s, 2) if wall_s else None,
+        "error_rate": round(errors / len(samples), 4),
+        "rejected_429": statuses.get("429", 0),
+        "status_counts": dict(sorted(statuses.items())),
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 2),
+            "p50": round(float(np.percentile(ms, 50)), 2),
+            "p95": round(float(np.percentile(ms, 95)), 2),
+            "p99": round(float(np.percentile(ms, 99)), 2),
+            "max": round(float(ms.max()), 2),
+        },
+    }
+
+
+def report(samples: List[Sample], wall_s: float, config: Dict) -> Dict:
+    by_endpoint: Dict[str, List[Sample]] = defaultdict(list)
+    for s in samples:
+        by_endpoint[s.endpoint].append(s)
+    return {
+        "config": config,
+        "wall_s": round(wall_s, 2),
+        "overall": _latency_stats(samples, wall_s),
+        "endpoints": {name: _latency_stats(rows, wall_s) for name, rows in sorted(by_endpoint.items())},
+    }
+
+
+def _start_servers(args: argparse.Namespace) -> Tuple[Dict[str, str], List[ServerProcess]]:
+    servers = []
+    log_dir: Optional[Path] = args.log_dir
+    if log_dir:
+        log_dir.mkdir(parents=True, exist_ok=True)
+    make: List[Tuple[str, Callable[[], ServerProcess]]] = [
+        ("app", lambda: ServerProcess("app", args.app_port, log_path=log_dir / "app.log" if log_dir else None)),
+        ("main", lambda: ServerProcess("main", args.main_port, env={"F1_OFFLINE": "1"}, log_path=log_dir / "main.log" if log_dir else None)),
+    ]
+    urls = {}
+    try:
+        for name, factory in make:
+            server = factory()
+            servers.append(server)
+            urls[name] = server.url
+        for server in servers:
+            server.wait_ready()
+    except Exception:
+        for server in servers:
+            server.stop()
+        raise
+    return urls, servers
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test app.py and main.py locally and report latency percentiles.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=None, help="closed-loop clients (default 50)")
+    mode.add_argument("--rate", type=float, default=None, help="open-loop arrival rate, requests/s")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival gaps with --rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--mix", default="predict=6,suggest=2,compare=2", help="endpoint=weight list")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-start", action="store_true", help="target already-running servers")
+    parser.add_argument("--app-url", default=None, help="app.py base URL (default: the started server, or :8001 with --no-start)")
+    parser.add_argument("--main-url", default=None, help="main.py base URL (default: the started server, or :8000 with --no-start)")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--main-port", type=int, default=8101)
+    parser.add_argument("--log-dir", type=Path, default=None, help="write server logs here")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    servers: List[ServerProcess] = []
+    if args.no_start:
+        # main.py on 8000 as in the README; app.py alongside it on 8001
+        urls = {"app": args.app_url or "http://127.0.0.1:8001", "main": args.main_url or "http://127.0.0.1:8000"}
+    else:
+        urls, servers = _start_servers(args)
+        urls["app"] = args.app_url or urls["app"]
+        urls["main"] = args.main_url or urls["main"]
+
+    try:
+        gen = LoadGenerator(urls, mix, timeout=args.timeout, seed=args.seed)
+        gen.warmup()
+        if args.rate:
+            wall = gen.run_rate(args.rate, args.duration, poisson=args.poisson)
+            config = {"mode": "rate", "rate_rps": args.rate, "poisson": args.poisson}
+        else:
+            clients = args.concurrency or 50
+            wall = gen.run_concurrency(clients, args.duration)
+            config = {"mode": "concurrency", "clients": clients}
+        config.update({"duration_s": args.duration, "mix": mix, "urls": urls})
+        out = report(gen.samples, wall, config)
+    finally:
+        for server in servers:
+            server.stop()
+
+    text = json.dumps(out, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import os
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
@@ -7,14 +9,19 @@ from typing import Dict, List, Literal, Optional
 
 import numpy as np
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel, Field
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 
+from cache_manager import HTTP_CACHE, CacheManager
+from scheduler import JobScheduler, SchedulerFull
+from serialization import negotiate
+
 # Optional FastF1 import (works offline with synthetic fallback)
 try:
     import fastf1  # type: ignore
@@ -25,6 +32,8 @@ except Exception:  # pragma: no cover
 
 BASE_DIR = Path(__file__).resolve().parent
 CACHE_DIR = BASE_DIR / ".fastf1_cache"
+# F1_OFFLINE=1 serves synthetic laps without touching FastF1 (load tests, demos)
+OFFLINE = os.environ.get("F1_OFFLINE", "") == "1"
 
 COMPOUND_BASE_PACE = {"SOFT": 0.0, "MEDIUM": 0.35, "HARD": 0.75}
 COMPOUND_DEG = {"SOFT": 0.095, "MEDIUM": 0.062, "HARD": 0.046}
@@ -73,6 +82,7 @@ class TrainedModel:
 class FastF1DataService:
     def __init__(self, cache_dir: Path) -> None:
         self.cache_dir = cache_dir
+        self.cache_manager = CacheManager(cache_dir)
         self._cache_enabled = False
         self._enable_cache()
 
@@ -81,6 +91,10 @@ class FastF1DataService:
             return
         try:
             self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Quick tail/header check only; the full unpickling verify is the CLI's job
+            self.cache_manager.verify(repair=True)
+            # FastF1 has not opened its HTTP sqlite yet, so it may be evicted here
+            self.cache_manager.enforce_budget()
             fastf1.Cache.enable_cache(str(self.cache_dir))
             self._cache_enabled = True
         except Exception:
@@ -94,12 +108,18 @@ class FastF1DataService:
         driver: str,
     ) -> pd.DataFrame:
         """Load laps with robust fallback for rate limits and API/data issues."""
-        if fastf1 is None:
+        if fastf1 is None or OFFLINE:
             return self.synthetic_laps(driver=driver)
 
         try:
             sess: Session = fastf1.get_session(year, event, session_code)
+            cache_key = str(getattr(sess, "api_path", "")).replace("/static/", "", 1).strip("/")
+            cache_hit = bool(cache_key) and (self.cache_dir / cache_key).is_dir()
             sess.load(laps=True, telemetry=False, weather=True)
+            if self._cache_enabled and cache_key:
+                self.cache_manager.record(cache_key, hit=cache_hit)
+                if not cache_hit:
+                    self.cache_manager.enforce_budget(pinned=HTTP_CACHE)
             laps = sess.laps.pick_drivers(driver).copy()
             if laps.empty:
                 return self.synthetic_laps(driver=driver)
@@ -152,7 +172,7 @@ def engineer_features(laps: pd.DataFrame, track_temp: float, air_temp: float) ->
     return df
 
 
-def train_lap_time_model(train_df: pd.DataFrame) -> TrainedModel:
+def train_lap_time_model(train_df: pd.DataFrame, n_jobs: int = -1, n_estimators: int = 240) -> TrainedModel:
     features = ["tyre_age", "compound", "track_temp", "air_temp", "estimated_fuel_load", "lap_number", "thermal_degradation", "mechanical_wear"]
     target = "LapTimeSeconds"
 
@@ -171,11 +191,11 @@ def train_lap_time_model(train_df: pd.DataFrame) -> TrainedModel:
     )
 
     model = RandomForestRegressor(
-        n_estimators=240,
+        n_estimators=n_estimators,
         max_depth=10,
         min_samples_leaf=2,
         random_state=42,
-        n_jobs=-1,
+        n_jobs=n_jobs,
     )
 
     pipe = Pipeline([("prep", pre), ("rf", model)])
@@ -277,12 +297,12 @@ def build_strategy_card(
     )
 
 
-def compare_strategies(req: CompareRequest, service: FastF1DataService) -> CompareResponse:
+def compare_strategies(req: CompareRequest, service: FastF1DataService, n_jobs: int = -1) -> CompareResponse:
     raw_laps = service.load_driver_laps(req.year, req.event, req.session, req.driver)
     model_df = engineer_features(raw_laps, req.track_temp_c, req.air_temp_c)
     model_df["LapTimeSeconds"] = raw_laps["LapTimeSeconds"].astype(float).values
 
-    trained = train_lap_time_model(model_df)
+    trained = train_lap_time_model(model_df, n_jobs=n_jobs)
     reference_actual = np.interp(
         np.arange(1, req.total_laps + 1),
         raw_laps["LapNumber"].astype(int).to_numpy(),
@@ -326,6 +346,10 @@ def compare_strategies(req: CompareRequest, service: FastF1DataService) -> Compa
 
 
 service = FastF1DataService(cache_dir=CACHE_DIR)
+scheduler = JobScheduler(
+    slots=int(os.environ.get("F1_SCHED_SLOTS", "0")) or None,
+    max_queue=int(os.environ.get("F1_SCHED_QUEUE", "16")),
+)
 app = FastAPI(title="F1 Strategy Predictor API", version="2.0.0")
 app.add_middleware(
     CORSMiddleware,
@@ -340,9 +364,26 @@ def health() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, float | int | str | None]:
+    return service.cache_manager.stats()
+
+
+@app.get("/scheduler/stats")
+def scheduler_stats() -> Dict[str, float | int]:
+    return scheduler.stats()
+
+
 @app.post("/strategy/compare", response_model=CompareResponse)
-def strategy_compare(req: CompareRequest) -> CompareResponse:
+async def strategy_compare(req: CompareRequest, request: Request, priority: int = Query(5, ge=0, le=9)) -> Response:
+    try:
+        future = scheduler.submit(compare_strategies, req, service, n_jobs=scheduler.threads_per_job, priority=priority)
+    except SchedulerFull as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": str(exc.retry_after)}) from exc
     try:
-        return compare_strategies(req, service)
+        result, timing = await asyncio.wrap_future(future)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Strategy comparison failed: {exc}") from exc
+    response = negotiate(request, result)
+    response.headers["Server-Timing"] = f"queue;dur={timing.queue_wait_s * 1000:.1f}, compute;dur={timing.compute_s * 1000:.1f}"
+    return response
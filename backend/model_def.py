@@ -1,3 +1,5 @@
+import math
+
 import torch
 import torch.nn as nn
 
@@ -15,3 +17,49 @@ class HybridLSTM(nn.Module):
         out, _ = self.lstm(x)
         h = out[:, -1, :]
         return self.head(h).squeeze(-1)
+
+
+class PositionalEncoding(nn.Module):
+    def __init__(self, d_model, max_len=512, dropout=0.1):
+        super().__init__()
+        self.dropout = nn.Dropout(dropout)
+        pe = torch.zeros(max_len, d_model)
+        pos = torch.arange(max_len).unsqueeze(1).float()
+        div = torch.exp(torch.arange(0, d_model, 2).float() * (-math.log(10000.0) / d_model))
+        pe[:, 0::2] = torch.sin(pos * div)
+        pe[:, 1::2] = torch.cos(pos * div)
+        self.register_buffer("pe", pe.unsqueeze(0))
+
+    def forward(self, x):
+        return self.dropout(x + self.pe[:, :x.size(1)])
+
+
+class TyreDegTransformer(nn.Module):
+    """Causal Transformer encoder mapping a stint (B, T, F) plus compound ids (B,) to lap times (B, T).
+
+    Architecture of data/tyre_transformer.pt, trained in notebooks/data_retrieval_2025.ipynb.
+    """
+
+    def __init__(self, num_features, num_compounds=6, d_model=64, nhead=4, num_layers=3,
+                 dim_feedforward=256, dropout=0.1, use_causal_mask=True):
+        super().__init__()
+        self.use_causal_mask = use_causal_mask
+        self.input_proj = nn.Linear(num_features, d_model)
+        self.compound_emb = nn.Embedding(num_compounds, d_model)
+        self.pos_enc = PositionalEncoding(d_model, dropout=dropout)
+        layer = nn.TransformerEncoderLayer(d_model=d_model, nhead=nhead, dim_feedforward=dim_feedforward,
+                                           dropout=dropout, batch_first=True)
+        self.encoder = nn.TransformerEncoder(layer, num_layers=num_layers)
+        self.head = nn.Sequential(
+            nn.Linear(d_model, d_model // 2),
+            nn.GELU(),
+            nn.Linear(d_model // 2, 1)
+        )
+
+    def forward(self, x, compound_ids):
+        T = x.size(1)
+        h = self.input_proj(x) + self.compound_emb(compound_ids).unsqueeze(1)
+        h = self.pos_enc(h)
+        mask = torch.triu(torch.ones(T, T, device=x.device), diagonal=1).bool() if self.use_causal_mask else None
+        h = self.encoder(h, mask=mask)
+        return self.head(h).squeeze(-1)
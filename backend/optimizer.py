@@ -1,8 +1,18 @@
-from typing import List, Dict, Any, Optional
+import itertools
+from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 
 import numpy as np
 
-from strategy_simulator import simulate_race
+from strategy_simulator import TYRE_PROFILES, apply_environment_modifiers, simulate_race
+
+# Integer codes used by the block enumerator; -1 pads unused stints/stops
+PLAN_COMPOUNDS = ["SOFT", "MEDIUM", "HARD", "INTERMEDIATE", "WET"]
+DRY_CODES = {0, 1, 2}
+MAX_STOPS = 4
+# Four-stop plans are ~20x the three-stop count on long races (28M at Monaco); opt in per request
+DEFAULT_MAX_STOPS = 3
+PAD = -1
 
 
 def _clamp(v: int, lo: int, hi: int) -> int:
@@ -66,6 +76,193 @@ def candidate_plans(race_laps: int, compounds: List[str]) -> List[Dict[str, Any]
     return _unique(cands)
 
 
+@dataclass
+class PitConstraints:
+    min_stint: int = 8
+    max_stint: Optional[int] = None
+    earliest: Optional[int] = None  # first lap a stop may be made at the end of
+    latest: Optional[int] = None
+    # Optional (lo, hi) window per stop index, e.g. [(12, 20)] pins the first stop
+    stop_windows: Optional[Sequence[Tuple[int, int]]] = None
+
+
+@dataclass
+class PlanBlock:
+    """Plans as integer arrays: compounds (n, MAX_STOPS + 1) codes, pit_laps (n, MAX_STOPS), stops (n,)."""
+
+    compounds: np.ndarray
+    pit_laps: np.ndarray
+    stops: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.stops)
+
+    def stint_lengths(self, race_laps: int) -> np.ndarray:
+        ends = np.where(self.pit_laps == PAD, race_laps, self.pit_laps).astype(np.int32)
+        ends = np.concatenate([ends, np.full((len(self), 1), race_laps, dtype=np.int32)], axis=1)
+        return np.diff(ends, axis=1, prepend=0)
+
+    def plan(self, i: int) -> Dict[str, Any]:
+        k = int(self.stops[i])
+        return {
+            "compounds": [PLAN_COMPOUNDS[c] for c in self.compounds[i, : k + 1]],
+            "pit_laps": [int(p) for p in self.pit_laps[i, :k]],
+        }
+
+
+def satisfies_two_compound_rule(compounds: Sequence[str]) -> bool:
+    """Two different dry compounds, unless a wet tyre was used."""
+    codes = {PLAN_COMPOUNDS.index(c) for c in compounds if c in PLAN_COMPOUNDS}
+    return len(DRY_CODES & codes) >= 2 or not DRY_CODES.issuperset(codes)
+
+
+def compound_sequences(compounds: List[str], stops: int, two_compound_rule: bool = True) -> np.ndarray:
+    """Every compound order for ``stops`` stops, as a (n, stops + 1) code array."""
+    codes = sorted({PLAN_COMPOUNDS.index(c) for c in compounds if c in PLAN_COMPOUNDS})
+    seqs = [
+        seq
+        for seq in itertools.product(codes, repeat=stops + 1)
+        if not two_compound_rule or satisfies_two_compound_rule([PLAN_COMPOUNDS[c] for c in seq])
+    ]
+    return np.array(seqs, dtype=np.int8).reshape(-1, stops + 1)
+
+
+def _pit_bounds(race_laps: int, stops: int, i: int, prev: int, c: PitConstraints) -> Tuple[int, int]:
+    """Feasible range for stop ``i`` (0-based) after a stop at ``prev`` (0 for none)."""
+    max_stint = c.max_stint or race_laps
+    left = stops - i  # stints still to run after this stop
+    lo = max(prev + c.min_stint, race_laps - left * max_stint, c.earliest or 1)
+    hi = min(prev + max_stint, race_laps - left * c.min_stint, c.latest or race_laps - 1)
+    if c.stop_windows and i < len(c.stop_windows):
+        lo, hi = max(lo, c.stop_windows[i][0]), min(hi, c.stop_windows[i][1])
+    return lo, hi
+
+
+def _pit_prefixes(race_laps: int, stops: int, c: PitConstraints, prefix: Tuple[int, ...] = ()) -> Iterator[Tuple[int, ...]]:
+    i = len(prefix)
+    if i == stops - 1:
+        yield prefix
+        return
+    lo, hi = _pit_bounds(race_laps, stops, i, prefix[-1] if prefix else 0, c)
+    for lap in range(lo, hi + 1):
+        yield from _pit_prefixes(race_laps, stops, c, prefix + (lap,))
+
+
+def enumerate_plans(
+    race_laps: int,
+    compounds: List[str],
+    constraints: Optional[PitConstraints] = None,
+    min_stops: int = 0,
+    max_stops: int = MAX_STOPS,
+    two_compound_rule: bool = True,
+    block_size: int = 65536,
+) -> Iterator[PlanBlock]:
+    """Lazily yield every legal plan in blocks of ``block_size`` rows.
+
+    Each (compound order, strictly increasing pit laps) pair is produced exactly
+    once, so no deduplication pass is needed. Under the two-compound rule a
+    0-stop plan is only legal on wet tyres.
+    """
+    c = constraints or PitConstraints()
+    max_stops = min(max_stops, MAX_STOPS)
+    comp = np.full((block_size, MAX_STOPS + 1), PAD, dtype=np.int8)
+    pits = np.full((block_size, MAX_STOPS), PAD, dtype=np.int16)
+    stops_col = np.zeros(block_size, dtype=np.int8)
+    fill = 0
+
+    for stops in range(min_stops, max_stops + 1):
+        seqs = compound_sequences(compounds, stops, two_compound_rule)
+        if not len(seqs):
+            continue
+        if stops == 0:
+            if c.max_stint and race_laps > c.max_stint:
+                continue
+            chunks = ((seqs, np.empty((len(seqs), 0), dtype=np.int16)),)
+        else:
+            chunks = _pit_chunks(race_laps, stops, c, seqs)
+
+        for chunk_comp, chunk_pits in chunks:
+            start = 0
+            while start < len(chunk_comp):
+                take = min(block_size - fill, len(chunk_comp) - start)
+                comp[fill : fill + take, : stops + 1] = chunk_comp[start : start + take]
+                pits[fill : fill + take, :stops] = chunk_pits[start : start + take]
+                stops_col[fill : fill + take] = stops
+                fill += take
+                start += take
+                if fill == block_size:
+                    yield PlanBlock(comp, pits, stops_col)
+                    comp = np.full((block_size, MAX_STOPS + 1), PAD, dtype=np.int8)
+                    pits = np.full((block_size, MAX_STOPS), PAD, dtype=np.int16)
+                    stops_col = np.zeros(block_size, dtype=np.int8)
+                    fill = 0
+    if fill:
+        yield PlanBlock(comp[:fill], pits[:fill], stops_col[:fill])
+
+
+def _pit_chunks(race_laps: int, stops: int, c: PitConstraints, seqs: np.ndarray) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    # The last stop is vectorised; earlier stops are walked in Python
+    for prefix in _pit_prefixes(race_laps, stops, c):
+        lo, hi = _pit_bounds(race_laps, stops, stops - 1, prefix[-1] if prefix else 0, c)
+        if hi < lo:
+            continue
+        last = np.arange(lo, hi + 1, dtype=np.int16)
+        chunk_pits = np.empty((len(last) * len(seqs), stops), dtype=np.int16)
+        chunk_pits[:, :-1] = prefix
+        chunk_pits[:, -1] = np.repeat(last, len(seqs))
+        yield np.tile(seqs, (len(last), 1)), chunk_pits
+
+
+def stint_cost_table(race_laps: int) -> np.ndarray:
+    """Tyre + fuel seconds of ``simulate_stint`` by (compound code, stint length).
+
+    The extra last row is all zeros so PAD (-1) codes cost nothing.
+    """
+    n = np.arange(race_laps + 1, dtype=float)
+    lap_i = n[:-1]
+    table = np.zeros((len(PLAN_COMPOUNDS) + 1, race_laps + 1))
+    for code, name in enumerate(PLAN_COMPOUNDS):
+        p = TYRE_PROFILES.get(name, TYRE_PROFILES["MEDIUM"])
+        wear = p["offset"] + p["wear_linear"] * lap_i + p["wear_quad"] * lap_i**2
+        cliff = np.maximum(0.0, lap_i + 1 - p["cliff_lap"]) * p["cliff_pen"]
+        table[code, 1:] = np.cumsum(wear + cliff) - 0.03 * n[1:] * (n[1:] - 1) / 2
+    return table
+
+
+def score_block(block: PlanBlock, race_laps: int, cost_table: np.ndarray, per_lap: float, pit_loss: float) -> np.ndarray:
+    """Total race time of every plan in ``block``; equals ``simulate_race`` up to float rounding."""
+    lengths = block.stint_lengths(race_laps)
+    tyre = cost_table[block.compounds, lengths].sum(axis=1)
+    return race_laps * per_lap + block.stops * pit_loss + tyre
+
+
+def best_plan_per_sequence(
+    race_laps: int,
+    compounds: List[str],
+    constraints: Optional[PitConstraints] = None,
+    max_stops: int = 3,
+) -> List[Dict[str, Any]]:
+    """Fastest pit laps for every legal compound order.
+
+    Base pace, track temperature and pit loss add the same time to every plan
+    with the same stop count, so within one compound order the ranking by tyre
+    cost holds at any of those settings. The winners are a complete candidate
+    set for sweeping them.
+    """
+    cost_table = stint_cost_table(race_laps)
+    best: Dict[Tuple[int, ...], Tuple[float, Dict[str, Any]]] = {}
+    for block in enumerate_plans(race_laps, compounds, constraints, min_stops=1, max_stops=max_stops):
+        scores = score_block(block, race_laps, cost_table, 0.0, 0.0)
+        keys = np.ascontiguousarray(block.compounds).view(np.dtype((np.void, block.compounds.shape[1])))[:, 0]
+        order = np.lexsort((scores, keys))
+        _, first = np.unique(keys[order], return_index=True)
+        for i in order[first]:
+            key = tuple(block.compounds[i])
+            if key not in best or scores[i] < best[key][0]:
+                best[key] = (float(scores[i]), block.plan(int(i)))
+    return [plan for _, plan in sorted(best.values(), key=lambda item: (len(item[1]["pit_laps"]), item[0]))]
+
+
 def plan_to_strategy(plan: Dict[str, Any], race_laps: int) -> List[tuple]:
     if not plan["pit_laps"]:
         return [(plan["compounds"][0], race_laps)]
@@ -93,11 +290,29 @@ def evaluate_plans(
     seq_len: int,
     track_env: Optional[dict],
     top_k: int = 5,
+    constraints: Optional[PitConstraints] = None,
+    max_stops: int = DEFAULT_MAX_STOPS,
 ) -> Dict[str, Any]:
-    plans = candidate_plans(race_laps, compounds)
-    scored = []
+    # Blocks are scored with the closed form of simulate_stint and only the
+    # running top-k is kept; the winners are then re-run through simulate_race.
+    cost_table = stint_cost_table(race_laps)
+    per_lap = float(base_lap) + apply_environment_modifiers(0.0, 1, track_env)
+    best_scores = np.empty(0)
+    best_plans: List[Dict[str, Any]] = []
+    evaluated = 0
 
-    for p in plans:
+    for block in enumerate_plans(race_laps, compounds, constraints, max_stops=max_stops):
+        evaluated += len(block)
+        scores = score_block(block, race_laps, cost_table, per_lap, pit_loss)
+        keep = np.argpartition(scores, top_k)[:top_k] if len(scores) > top_k else np.arange(len(scores))
+        best_scores = np.concatenate([best_scores, scores[keep]])
+        best_plans += [block.plan(int(i)) for i in keep]
+        order = np.argsort(best_scores, kind="stable")[:top_k]
+        best_scores = best_scores[order]
+        best_plans = [best_plans[i] for i in order]
+
+    scored = []
+    for p in best_plans:
         strategy = plan_to_strategy(p, race_laps)
         total, laps = simulate_race(
             strategy,
@@ -125,7 +340,7 @@ def evaluate_plans(
     return {
         "best": best,
         "top": scored[:top_k],
-        "evaluated": len(scored),
+        "evaluated": evaluated,
         # backward-compatible fields expected by app.py
         "best_strategy": best["strategy"] if best else None,
         "best_time": best["total_race_time"] if best else None,
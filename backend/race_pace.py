@@ -0,0 +1,119 @@
+"""Batch scoring with models/race_pace_predictor.pkl.
+
+Feature rows come from an in-memory index over hybrid_pace_features.csv keyed
+by (driverId, circuitId), holding each driver's latest row at each circuit,
+so a request never filters pandas frames. The feature matrix is published
+through the artifact store, which means all workers share one copy. A whole
+grid is scored with one ``predict`` call, and results for a circuit are
+memoized.
+"""
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from artifact_store import store
+
+BASE_DIR = Path(__file__).resolve().parent
+PACE_FEATURES_PATH = BASE_DIR / "Excelfiles" / "hybrid_pace_features.csv"
+RACE_MODEL_PATH = BASE_DIR / "models" / "race_pace_predictor.pkl"
+RACE_FEATURES_PATH = BASE_DIR / "models" / "race_model_features.txt"
+
+# Saved as a one-column pandas Series, so the first line is the header "0"
+FEATURES = [f for f in RACE_FEATURES_PATH.read_text().split() if f != "0"]
+
+
+class FeatureIndex:
+    def __init__(self) -> None:
+        artifact = store.get_or_publish("race_pace_features", PACE_FEATURES_PATH, self._build)
+        a = artifact.arrays
+        self.matrix = a["features"]
+        self.codes = [bytes(c).decode().strip("\0") for c in a["codes"]]
+        self.driver_ids = a["driver_ids"]
+        self.by_key: Dict[Tuple[int, int], int] = {
+            (int(d), int(c)): i for i, (d, c) in enumerate(zip(a["driver_ids"], a["circuit_ids"]))
+        }
+        # Fallback for a driver with no history at a circuit: their most recent row anywhere
+        self.latest: Dict[int, int] = {int(d): int(i) for d, i in zip(a["latest_driver_ids"], a["latest_rows"])}
+        self.default_field: List[int] = a["default_field"].tolist()
+        self.circuits = {int(c) for c in a["circuit_ids"]}
+
+    @staticmethod
+    def _build() -> Dict[str, np.ndarray]:
+        df = pd.read_csv(PACE_FEATURES_PATH).sort_values("raceId")
+        rows = df.groupby(["driverId", "circuitId"], sort=False).tail(1).reset_index(drop=True)
+        latest = rows.reset_index().groupby("driverId").tail(1)
+        latest_race = df[df["raceId"] == df["raceId"].max()].sort_values("grid")
+        return {
+            "features": rows[FEATURES].to_numpy(dtype=np.float64),
+            "driver_ids": rows["driverId"].to_numpy(dtype=np.int64),
+            "circuit_ids": rows["circuitId"].to_numpy(dtype=np.int64),
+            "codes": rows["code"].fillna("").astype(str).to_numpy(dtype="S3"),
+            "latest_driver_ids": latest["driverId"].to_numpy(dtype=np.int64),
+            "latest_rows": latest["index"].to_numpy(dtype=np.int64),
+            "default_field": latest_race["driverId"].to_numpy(dtype=np.int64),
+        }
+
+    def rows_for(self, driver_ids: List[int], circuit_id: int) -> Tuple[np.ndarray, List[bool]]:
+        idx, at_circuit = [], []
+        for d in driver_ids:
+            i = self.by_key.get((d, circuit_id))
+            at_circuit.append(i is not None)
+            if i is None:
+                i = self.latest.get(d)
+            if i is None:
+                raise KeyError(f"No pace features for driverId {d}")
+            idx.append(i)
+        return np.array(idx), at_circuit
+
+
+_lock = threading.Lock()
+_index: Optional[FeatureIndex] = None
+_model = None
+
+
+def _resources():
+    global _index, _model
+    with _lock:
+        if _index is None:
+            _index = FeatureIndex()
+            _model = joblib.load(RACE_MODEL_PATH)
+        return _index, _model
+
+
+@lru_cache(maxsize=256)
+def predict_grid(circuit_id: int, driver_ids: Tuple[int, ...] = (), grid: Tuple[Tuple[int, int], ...] = ()) -> Dict:
+    """Score ``driver_ids`` (default: the latest entry list) at ``circuit_id`` in one call."""
+    index, model = _resources()
+    if circuit_id not in index.circuits:
+        raise KeyError(f"Unknown circuitId {circuit_id}")
+    drivers = list(driver_ids) or index.default_field
+    rows, at_circuit = index.rows_for(drivers, circuit_id)
+    X = np.array(index.matrix[rows], dtype=np.float64)
+    overrides = dict(grid)
+    if overrides:
+        grid_col = FEATURES.index("grid")
+        X[:, grid_col] = [overrides.get(d, g) for d, g in zip(drivers, X[:, grid_col])]
+
+    pred = model.predict(pd.DataFrame(X, columns=FEATURES))
+    order = np.argsort(pred, kind="stable")
+    return {
+        "circuitId": circuit_id,
+        "predictions": [
+            {
+                "rank": rank + 1,
+                "driverId": int(drivers[i]),
+                "code": index.codes[rows[i]],
+                "grid": int(X[i, FEATURES.index("grid")]),
+                "predicted_position": round(float(pred[i]), 3),
+                "circuit_history": at_circuit[i],
+            }
+            for rank, i in enumerate(order)
+        ],
+    }
@@ -0,0 +1,182 @@
+"""Precomputed "box now or stay out?" policy for safety-car / VSC periods.
+
+Backward induction over (lap, compound, tyre age, compounds used, stops left)
+using the simulator's tyre model (``TYRE_PROFILES``) with laps after the
+current one assumed green. For every state the table keeps
+
+- ``delta``: time the best pit stop saves versus staying out, before pit loss
+- ``pit_compound``: the compound to fit if boxing
+
+- ``feasible``: whether staying out / boxing can still meet the two-compound rule
+
+so the decision under any status is ``delta > pit_loss * PIT_LOSS_FACTOR[status]``,
+a single O(1) lookup. Fuel is charged per stint as ``simulate_stint`` does
+(-0.03 s for every lap still to run in the stint, ``-0.03 * n(n-1)/2`` over an
+n-lap stint). Each extra lap on a set adds ``-0.03 * (stint lap - 1)`` to
+that sum, so it folds into the lap cost by tyre age and longer stints are
+credited exactly as in ``simulate_race``, /optimize_strategy and /sweep.
+
+Tables are built per track from track_params.json and shared across workers
+through the artifact store. Build or refresh them all with::
+
+    python sc_policy.py
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from artifact_store import store
+from strategy_simulator import TRACK_PARAMS, TRACK_PARAMS_PATH, TYRE_PROFILES
+
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+PIT_LOSS_FACTOR = {"GREEN": 1.0, "VSC": 0.65, "SC": 0.45}
+MAX_STOPS = 3
+INFEASIBLE = 6.0e4  # fits float16; marks plans breaking the two-compound rule
+FUEL_PER_LAP = 0.03  # simulate_stint's fuel correction, s per lap left in the stint
+STAY_OK, PIT_OK = 1, 2  # bits of ``feasible``
+RECHECK_S = 30.0  # how often a cached table re-checks track_params.json
+
+_policies: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_policies_lock = threading.Lock()
+
+
+def lap_cost_table(base_lap: float, max_stint: int) -> np.ndarray:
+    """Lap time by (compound, stint lap): ``tyre_degradation_heuristic`` plus the
+    incremental fuel credit, so a stint's row sum equals ``simulate_stint``'s."""
+    stint_lap = np.arange(max_stint + 1, dtype=float)
+    lap_i = np.maximum(0.0, stint_lap - 1)
+    rows = []
+    for compound in COMPOUNDS:
+        p = TYRE_PROFILES[compound]
+        wear = p["wear_linear"] * lap_i + p["wear_quad"] * lap_i**2
+        cliff = np.maximum(0.0, lap_i + 1 - p["cliff_lap"]) * p["cliff_pen"]
+        rows.append(base_lap + p["offset"] + wear + cliff - FUEL_PER_LAP * lap_i)
+    return np.stack(rows)
+
+
+def build_policy(laps: int, base_lap: float, pit_loss: float, max_stops: int = MAX_STOPS) -> Dict[str, np.ndarray]:
+    n_c, n_a, n_u, n_s = len(COMPOUNDS), laps + 1, 1 << len(COMPOUNDS), max_stops + 1
+    cost = lap_cost_table(base_lap, laps + 1)  # (C, stint lap)
+    c_idx = np.arange(n_c)
+    used_after_pit = np.arange(n_u)[None, :] | (1 << c_idx)[:, None]  # (C', U)
+    compounds_used = np.array([bin(u).count("1") for u in range(n_u)])
+    age_next = np.minimum(np.arange(n_a) + 1, n_a - 1)
+
+    # value[c, age, used, stops_left]: best remaining time at the start of a lap.
+    # Terminal value is zero once two dry compounds have been used.
+    value = np.broadcast_to(np.where(compounds_used >= 2, 0.0, INFEASIBLE)[None, None, :, None], (n_c, n_a, n_u, n_s))
+    delta = np.empty((laps, n_c, n_a, n_u, n_s), dtype=np.float16)
+    pit_compound = np.empty((laps, n_u, n_s), dtype=np.int8)
+    feasible = np.empty((laps, n_c, n_a, n_u, n_s), dtype=np.int8)
+
+    for lap in range(laps, 0, -1):
+        stay = cost[:, 1 : n_a + 1][:, :, None, None] + value[:, age_next]
+        pit_future = np.full((n_c, n_u, n_s), 2 * INFEASIBLE)
+        pit_future[:, :, 1:] = cost[:, 1][:, None, None] + value[c_idx[:, None], 1, used_after_pit][:, :, :-1]
+        best_pit = pit_future.min(axis=0)  # (U, S), excluding pit loss
+
+        delta[lap - 1] = np.clip(stay - best_pit[None, None], -INFEASIBLE, INFEASIBLE)
+        pit_compound[lap - 1] = pit_future.argmin(axis=0)
+        feasible[lap - 1] = (stay < INFEASIBLE) * STAY_OK + (best_pit < INFEASIBLE)[None, None] * PIT_OK
+        # Later laps are assumed green, so future stops pay the full pit loss
+        value = np.minimum(np.minimum(stay, best_pit[None, None] + pit_loss), 2 * INFEASIBLE)
+    return {"delta": delta, "pit_compound": pit_compound, "feasible": feasible}
+
+
+def track_policy(track: str) -> Dict[str, Any]:
+    """Policy arrays for ``track``, memoized per process and re-validated every ``RECHECK_S``."""
+    cached = _policies.get(track)
+    if cached and time.monotonic() - cached[0] < RECHECK_S:
+        return cached[1]
+    with _policies_lock:
+        arrays = _load_policy(track)
+        _policies[track] = (time.monotonic(), arrays)
+        return arrays
+
+
+def _load_policy(track: str) -> Dict[str, Any]:
+    """Slow path: built on first use and shared via the artifact store.
+
+    track_params.json is re-read here rather than taken from the import-time
+    ``TRACK_PARAMS``, and the artifact is keyed on the very values the build
+    uses, so an edit republishes the table with the new numbers.
+    """
+    meta = json.loads(TRACK_PARAMS_PATH.read_text())[track]
+    params = [int(meta["laps"]), float(meta["avg_lap"]), float(meta["pit_loss"])]
+
+    def build() -> Dict[str, np.ndarray]:
+        arrays = build_policy(*params)
+        arrays["params"] = np.array(params, dtype=float)
+        return arrays
+
+    fingerprint = {"path": str(TRACK_PARAMS_PATH), "track": track, "params": params}
+    artifact = store.get_or_publish(
+        f"sc_policy_{track.lower().replace(' ', '_')}", TRACK_PARAMS_PATH, build, fingerprint=fingerprint
+    )
+    return artifact.arrays
+
+
+def decide(
+    track: str,
+    lap: int,
+    compound: str,
+    tyre_age: int,
+    compounds_used: Iterable[str],
+    stops_left: int,
+    status: str = "SC",
+    pit_loss: float | None = None,
+) -> Dict[str, Any]:
+    """O(1) lookup of the box/stay call at the start of ``lap``.
+
+    Raises ValueError for a state the race cannot be in (a lap past the flag,
+    tyres older than the race, more stops than the table covers). States from
+    which the two-compound rule can no longer be met come back with
+    ``feasible`` False and no ``gain_s``; if only boxing keeps the plan legal
+    the call is BOX with ``forced`` True.
+    """
+    policy = track_policy(track)
+    laps = policy["delta"].shape[0]
+    if compound.upper() not in COMPOUNDS:
+        raise ValueError(f"Unsupported compound '{compound}'.")
+    if not 1 <= int(lap) <= laps:
+        raise ValueError(f"lap must be between 1 and {laps} for {track}, got {lap}.")
+    if not 0 <= int(tyre_age) <= int(lap):
+        raise ValueError(f"tyre_age must be between 0 and lap ({lap}), got {tyre_age}.")
+    if not 0 <= int(stops_left) <= MAX_STOPS:
+        raise ValueError(f"stops_left must be between 0 and {MAX_STOPS}, got {stops_left}.")
+    used = 0
+    for c in [compound, *compounds_used]:
+        if c.upper() in COMPOUNDS:
+            used |= 1 << COMPOUNDS.index(c.upper())
+    lap_i, c_i, age_i, stops_i = int(lap) - 1, COMPOUNDS.index(compound.upper()), int(tyre_age), int(stops_left)
+
+    loss = (pit_loss if pit_loss is not None else float(policy["params"][2])) * PIT_LOSS_FACTOR[status.upper()]
+    flags = int(policy["feasible"][lap_i, c_i, age_i, used, stops_i])
+    stay_ok, pit_ok = bool(flags & STAY_OK), bool(flags & PIT_OK) and stops_i > 0
+    gain: Optional[float] = None
+    if stay_ok and pit_ok:
+        gain = round(float(policy["delta"][lap_i, c_i, age_i, used, stops_i]) - loss, 3)
+        box = gain > 0
+    else:
+        box = pit_ok and not stay_ok
+    return {
+        "action": "BOX" if box else "STAY",
+        "compound": COMPOUNDS[int(policy["pit_compound"][lap_i, used, stops_i])] if pit_ok else None,
+        "gain_s": gain,
+        "effective_pit_loss": round(loss, 3),
+        "status": status.upper(),
+        "feasible": stay_ok or pit_ok,
+        "forced": box and not stay_ok,
+    }
+
+if __name__ == "__main__":
+    summary = {}
+    for name in TRACK_PARAMS:
+        arrays = track_policy(name)
+        summary[name] = {"laps": int(arrays["params"][0]), "bytes": int(sum(a.nbytes for a in arrays.values()))}
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,134 @@
+"""Bounded job scheduler for model training/inference.
+
+A fixed number of worker slots pull jobs from a bounded priority queue, and each
+job gets ``cores // slots`` threads, so concurrent requests never oversubscribe
+the CPU. The thread limit is applied once as each slot starts and never
+restored (the BLAS limits are process-wide, so per-job enter/exit would race
+between slots). When the queue is full ``submit`` raises ``SchedulerFull`` carrying a
+Retry-After estimate instead of letting latency grow without bound.
+"""
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+# threadpoolctl ships with scikit-learn; without it only n_jobs is capped
+try:
+    from threadpoolctl import threadpool_limits  # type: ignore
+except Exception:  # pragma: no cover
+    threadpool_limits = None
+
+
+class SchedulerFull(Exception):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Scheduler queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class JobTiming:
+    queue_wait_s: float
+    compute_s: float
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    fn: Callable[..., Any] = field(compare=False)
+    args: tuple = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    future: Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class JobScheduler:
+    def __init__(self, slots: Optional[int] = None, max_queue: int = 16, cores: Optional[int] = None) -> None:
+        self.cores = cores or os.cpu_count() or 1
+        self.slots = max(1, min(slots or max(1, self.cores // 2), self.cores))
+        self.threads_per_job = max(1, self.cores // self.slots)
+        self.max_queue = max_queue
+
+        self._queue: "queue.PriorityQueue[_Job]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._compute_total = 0.0
+
+        for i in range(self.slots):
+            threading.Thread(target=self._worker, name=f"job-slot-{i}", daemon=True).start()
+
+    def _avg_compute(self) -> float:
+        return self._compute_total / self._completed if self._completed else 1.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, priority: int = 5, **kwargs: Any) -> Future:
+        """Queue ``fn(*args, **kwargs)``; lower priority values run first.
+
+        The future resolves to ``(result, JobTiming)``.
+        """
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                backlog = (self._queued + self._running) / self.slots
+                raise SchedulerFull(retry_after=max(1, math.ceil(backlog * self._avg_compute())))
+            self._queued += 1
+        future: Future = Future()
+        self._queue.put(_Job(priority, next(self._seq), fn, args, kwargs, future, time.perf_counter()))
+        return future
+
+    def _worker(self) -> None:
+        if threadpool_limits is not None:
+            # Same value from every slot; OpenMP's limit is per thread so each slot sets its own
+            threadpool_limits(limits=self.threads_per_job)
+        while True:
+            job = self._queue.get()
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            if not job.future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._running -= 1
+                continue
+            try:
+                result = job.fn(*job.args, **job.kwargs)
+                error = None
+            except BaseException as exc:
+                error = exc
+            finished = time.perf_counter()
+            timing = JobTiming(queue_wait_s=started - job.enqueued_at, compute_s=finished - started)
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._wait_total += timing.queue_wait_s
+                self._compute_total += timing.compute_s
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result((result, timing))
+
+    def stats(self) -> Dict[str, float | int]:
+        with self._lock:
+            done = max(1, self._completed)
+            return {
+                "slots": self.slots,
+                "threads_per_job": self.threads_per_job,
+                "max_queue": self.max_queue,
+                "queued": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_queue_wait_s": round(self._wait_total / done, 4),
+                "avg_compute_s": round(self._compute_total / done, 4),
+            }
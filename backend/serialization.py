@@ -0,0 +1,245 @@
+"""Content negotiation for responses carrying per-lap arrays.
+
+Plain JSON stays the default. Clients can opt in to a cheaper encoding via
+the ``Accept`` header:
+
+- ``application/vnd.f1.fastjson+json``: same document, encoded with orjson
+  (falls back to compact stdlib JSON when orjson is not installed).
+- ``application/vnd.f1.laps``: a JSON header plus every lap series packed as
+  little-endian float32 buffers (layout below).
+- ``application/vnd.apache.arrow.stream``: Arrow IPC stream with one row per
+  lap series (requires pyarrow).
+
+Lap series are the fields named in ``LAP_SERIES_KEYS``; every other field,
+sweep axes and grids included, stays in the JSON part. All JSON output is
+strict: NaN and infinities are written as ``null``.
+
+Bodies larger than ``COMPRESS_MIN_BYTES`` are compressed with br or gzip
+according to ``Accept-Encoding`` (br needs the optional brotli package).
+
+Binary layout of ``application/vnd.f1.laps``::
+
+    bytes 0..3    magic b"F1LB"
+    bytes 4..7    uint32 LE header length H (multiple of 4)
+    bytes 8..8+H  UTF-8 JSON header, space padded
+    rest          concatenated float32 LE buffers
+
+The header is ``{"data": <document without lap series>, "buffers": [{"path":
+"/default_strategy/predicted_lap_times", "offset": 0, "length": 57}, ...]}``
+with offsets counted in float32 items from the start of the buffer section.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Optional fast paths; plain JSON works without any of them
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+try:
+    import pyarrow as pa  # type: ignore
+except Exception:  # pragma: no cover
+    pa = None
+
+try:
+    import brotli  # type: ignore
+except Exception:  # pragma: no cover
+    brotli = None
+
+JSON_MEDIA_TYPE = "application/json"
+FAST_JSON_MEDIA_TYPE = "application/vnd.f1.fastjson+json"
+LAPS_MEDIA_TYPE = "application/vnd.f1.laps"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+LAPS_MAGIC = b"F1LB"
+COMPRESS_MIN_BYTES = 4096
+# Per-lap float fields packed into binary buffers, matched by key name
+LAP_SERIES_KEYS = frozenset(
+    {"lap_times", "degradation", "predicted_lap_times", "smoothed_prediction", "reference_actual_lap_times"}
+)
+
+
+def _parse_header_list(value: str) -> List[Tuple[str, float]]:
+    """Split an Accept/Accept-Encoding header into (token, q) sorted by q."""
+    items: List[Tuple[str, float]] = []
+    for part in value.split(","):
+        token, *params = [p.strip() for p in part.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        items.append((token.lower(), q))
+    return sorted((i for i in items if i[1] > 0), key=lambda i: -i[1])
+
+
+def choose_media_type(accept: Optional[str]) -> str:
+    available = {JSON_MEDIA_TYPE, FAST_JSON_MEDIA_TYPE, LAPS_MEDIA_TYPE}
+    if pa is not None:
+        available.add(ARROW_MEDIA_TYPE)
+    for token, _ in _parse_header_list(accept or ""):
+        if token in available:
+            return token
+    return JSON_MEDIA_TYPE
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    tokens = [t for t, _ in _parse_header_list(accept_encoding or "")]
+    if brotli is not None and "br" in tokens:
+        return "br"
+    if "gzip" in tokens:
+        return "gzip"
+    return None
+
+
+def _to_document(payload: Any) -> Any:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump() if hasattr(payload, "model_dump") else payload.dict()
+    return payload
+
+
+def _finite(doc: Any) -> Any:
+    """``doc`` with numpy values unwrapped and NaN/inf replaced by None."""
+    if isinstance(doc, dict):
+        return {k: _finite(v) for k, v in doc.items()}
+    if isinstance(doc, (list, tuple)):
+        return [_finite(v) for v in doc]
+    if isinstance(doc, np.ndarray):
+        return _finite(doc.tolist())
+    if isinstance(doc, np.generic):
+        doc = doc.item()
+    if isinstance(doc, float) and not np.isfinite(doc):
+        return None
+    return doc
+
+
+def _is_lap_series(key: str, value: Any) -> bool:
+    if key not in LAP_SERIES_KEYS:
+        return False
+    if isinstance(value, np.ndarray):
+        return value.ndim == 1 and value.dtype.kind in "fiu"
+    if isinstance(value, list):
+        return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+    return False
+
+
+def split_lap_series(doc: Any, path: str = "") -> Tuple[Any, List[Tuple[str, np.ndarray]]]:
+    """Pull float lap series out of ``doc``; returns (remaining doc, [(json pointer, float32 array)])."""
+    series: List[Tuple[str, np.ndarray]] = []
+    if isinstance(doc, dict):
+        out: Dict[str, Any] = {}
+        for key, value in doc.items():
+            child = f"{path}/{key}"
+            if _is_lap_series(key, value):
+                series.append((child, np.asarray(value, dtype="<f4")))
+            else:
+                out[key], nested = split_lap_series(value, child)
+                series.extend(nested)
+        return out, series
+    if isinstance(doc, (list, tuple)):
+        items = []
+        for idx, value in enumerate(doc):
+            items_value, nested = split_lap_series(value, f"{path}/{idx}")
+            items.append(items_value)
+            series.extend(nested)
+        return items, series
+    return doc, series
+
+
+def encode_json(doc: Any) -> bytes:
+    return json.dumps(_finite(doc), allow_nan=False).encode("utf-8")
+
+
+def encode_fast_json(doc: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(doc, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_finite(doc), allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_lap_buffers(doc: Any) -> bytes:
+    data, series = split_lap_series(doc)
+    buffers = []
+    offset = 0
+    for pointer, arr in series:
+        buffers.append({"path": pointer, "offset": offset, "length": int(arr.size)})
+        offset += int(arr.size)
+    header = json.dumps({"data": _finite(data), "buffers": buffers}, allow_nan=False).encode("utf-8")
+    header += b" " * (-len(header) % 4)
+    body = b"".join(arr.tobytes() for _, arr in series)
+    return LAPS_MAGIC + struct.pack("<I", len(header)) + header + body
+
+
+def decode_lap_buffers(raw: bytes) -> Dict[str, Any]:
+    """Inverse of ``encode_lap_buffers``; lap series come back as float32 arrays."""
+    if raw[:4] != LAPS_MAGIC:
+        raise ValueError("Not an application/vnd.f1.laps payload")
+    (header_len,) = struct.unpack_from("<I", raw, 4)
+    header = json.loads(raw[8 : 8 + header_len].decode("utf-8"))
+    values = np.frombuffer(raw, dtype="<f4", offset=8 + header_len)
+    doc = header["data"]
+    for buf in header["buffers"]:
+        *parents, leaf = buf["path"].split("/")[1:]
+        target = doc
+        for key in parents:
+            target = target[int(key)] if isinstance(target, list) else target[key]
+        target[leaf] = values[buf["offset"] : buf["offset"] + buf["length"]]
+    return doc
+
+
+def encode_arrow(doc: Any) -> bytes:
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    data, series = split_lap_series(doc)
+    table = pa.table(
+        {
+            "path": pa.array([p for p, _ in series], type=pa.string()),
+            "values": pa.array([arr for _, arr in series], type=pa.list_(pa.float32())),
+        }
+    ).replace_schema_metadata({"data": json.dumps(_finite(data), allow_nan=False)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+ENCODERS = {
+    JSON_MEDIA_TYPE: encode_json,
+    FAST_JSON_MEDIA_TYPE: encode_fast_json,
+    LAPS_MEDIA_TYPE: encode_lap_buffers,
+    ARROW_MEDIA_TYPE: encode_arrow,
+}
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=5)
+    return body
+
+
+def negotiate(request: Request, payload: Any, status_code: int = 200) -> Response:
+    """Encode ``payload`` in the representation the client asked for."""
+    media_type = choose_media_type(request.headers.get("accept"))
+    body = ENCODERS[media_type](_to_document(payload))
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    encoding = choose_encoding(request.headers.get("accept-encoding")) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, status_code=status_code, media_type=media_type, headers=headers)
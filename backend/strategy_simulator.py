@@ -4,6 +4,7 @@ from typing import Dict, Optional, List, Tuple
 
 import numpy as np
 import torch
+from artifact_store import load_torch_weights
 from model_def import HybridLSTM
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -44,8 +45,7 @@ def _load_deg_model():
         input_dim = len(features.get("opt3_features", []))
         
         model = HybridLSTM(input_dim=input_dim)
-        state = torch.load(DEG_MODEL_PATH, map_location=device)
-        model.load_state_dict(state)
+        load_torch_weights(model, "hybrid_opt3", DEG_MODEL_PATH)
         model.eval().to(device)
         print(f"[INFO] HybridLSTM loaded on {device}")
         _deg_model = (model, device)
@@ -0,0 +1,92 @@
+"""Broadcast sensitivity sweep over pit loss x track temperature x base pace.
+
+``simulate_race`` total time separates into terms that each depend on one
+parameter::
+
+    total = laps * (base_lap + env(track_temp)) + stops * pit_loss + tyre_and_fuel
+
+so the tyre/fuel part is computed once per strategy from ``TYRE_PROFILES``
+and the whole grid is one NumPy broadcast of shape
+(strategies, pit_loss, track_temp, base_lap).
+"""
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from strategy_simulator import TYRE_PROFILES, apply_environment_modifiers
+
+
+def stint_cost(compound: str, laps: int) -> float:
+    """Sum of tyre and fuel terms of ``simulate_stint`` for one stint, excluding base pace."""
+    p = TYRE_PROFILES.get(compound.upper(), TYRE_PROFILES["MEDIUM"])
+    lap_i = np.arange(laps, dtype=float)
+    wear = p["wear_linear"] * lap_i + p["wear_quad"] * lap_i**2
+    cliff = np.maximum(0.0, lap_i + 1 - p["cliff_lap"]) * p["cliff_pen"]
+    fuel = -0.03 * (laps - 1 - lap_i)
+    return float(np.sum(p["offset"] + wear + cliff + fuel))
+
+
+def strategy_terms(strategies: Sequence[Sequence[Tuple[str, int]]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-strategy (race laps, pit stops, tyre+fuel seconds)."""
+    laps = np.array([sum(int(n) for _, n in s) for s in strategies], dtype=float)
+    stops = np.array([max(0, len(s) - 1) for s in strategies], dtype=float)
+    cost = np.array([sum(stint_cost(c, int(n)) for c, n in s) for s in strategies], dtype=float)
+    return laps, stops, cost
+
+
+def sweep_totals(
+    strategies: Sequence[Sequence[Tuple[str, int]]],
+    pit_losses: Sequence[float],
+    track_temps: Sequence[float],
+    base_laps: Sequence[float],
+) -> np.ndarray:
+    """Total race time for every strategy and grid cell, shape (S, P, T, B)."""
+    laps, stops, cost = strategy_terms(strategies)
+    pit = np.asarray(pit_losses, dtype=float)
+    env = apply_environment_modifiers(0.0, 1, {"track_temp": np.asarray(track_temps, dtype=float)})
+    base = np.asarray(base_laps, dtype=float)
+
+    per_lap = env[:, None] + base[None, :]  # (T, B)
+    return (
+        laps[:, None, None, None] * per_lap[None, None, :, :]
+        + (stops[:, None] * pit[None, :])[:, :, None, None]
+        + cost[:, None, None, None]
+    )
+
+
+def sweep(
+    strategies: Sequence[Sequence[Tuple[str, int]]],
+    pit_losses: Sequence[float],
+    track_temps: Sequence[float],
+    base_laps: Sequence[float],
+    include_totals: bool = False,
+) -> Dict[str, Any]:
+    totals = sweep_totals(strategies, pit_losses, track_temps, base_laps)
+    winner = np.argmin(totals, axis=0)
+    best = np.take_along_axis(totals, winner[None], axis=0)[0]
+    if len(strategies) > 1:
+        second = np.partition(totals, 1, axis=0)[1]
+        margin = second - best
+    else:
+        margin = np.zeros_like(best)
+
+    counts = np.bincount(winner.ravel(), minlength=len(strategies))
+    out: Dict[str, Any] = {
+        "axes": ["pit_loss", "track_temp", "base_lap_time"],
+        "shape": list(winner.shape),
+        "pit_loss": [float(v) for v in pit_losses],
+        "track_temp": [float(v) for v in track_temps],
+        "base_lap_time": [float(v) for v in base_laps],
+        "strategies": [[(c, int(n)) for c, n in s] for s in strategies],
+        "winner": winner.ravel(),
+        "best_time": np.round(best, 3).ravel(),
+        "margin_to_second": np.round(margin, 3).ravel(),
+        "win_share": {int(i): round(float(counts[i]) / winner.size, 4) for i in np.flatnonzero(counts)},
+    }
+    if include_totals:
+        out["totals"] = np.round(totals, 3).ravel()
+    return out
+
+
+def default_grid(center: float, half_width: float, steps: int) -> List[float]:
+    return np.round(np.linspace(center - half_width, center + half_width, steps), 3).tolist()
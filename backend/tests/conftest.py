@@ -0,0 +1,10 @@
+"""Shared setup: import the flat backend modules and keep artifacts out of /dev/shm."""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+# Must be set before artifact_store is first imported
+os.environ.setdefault("F1_ARTIFACT_DIR", tempfile.mkdtemp(prefix="f1-artifacts-test-"))
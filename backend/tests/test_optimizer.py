@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+
+from optimizer import (
+    PitConstraints,
+    enumerate_plans,
+    evaluate_plans,
+    plan_to_strategy,
+    score_block,
+    stint_cost_table,
+)
+from strategy_simulator import apply_environment_modifiers, simulate_race
+
+RACE_LAPS = 14
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+CONSTRAINTS = PitConstraints(min_stint=3, max_stint=9)
+MAX_STOPS = 3
+
+
+def brute_force_plans():
+    plans = set()
+    for stops in range(MAX_STOPS + 1):
+        for cuts in itertools.combinations(range(1, RACE_LAPS), stops):
+            lengths = np.diff((0, *cuts, RACE_LAPS))
+            if lengths.min() < CONSTRAINTS.min_stint or lengths.max() > CONSTRAINTS.max_stint:
+                continue
+            for seq in itertools.product(COMPOUNDS, repeat=stops + 1):
+                if len(set(seq)) >= 2:
+                    plans.add((seq, cuts))
+    return plans
+
+
+def enumerated_plans():
+    # A small block size so plans straddle block boundaries
+    blocks = list(enumerate_plans(RACE_LAPS, COMPOUNDS, CONSTRAINTS, max_stops=MAX_STOPS, block_size=50))
+    plans = [block.plan(i) for block in blocks for i in range(len(block))]
+    return blocks, [(tuple(p["compounds"]), tuple(p["pit_laps"])) for p in plans]
+
+
+def test_enumerator_is_complete_and_unique():
+    _, plans = enumerated_plans()
+    assert len(plans) == len(set(plans))
+    assert set(plans) == brute_force_plans()
+
+
+def test_block_scores_match_simulate_race():
+    base_lap, pit_loss, env = 90.0, 21.5, {"track_temp": 41.0}
+    per_lap = base_lap + apply_environment_modifiers(0.0, 1, env)
+    table = stint_cost_table(RACE_LAPS)
+    blocks, _ = enumerated_plans()
+    for block in blocks:
+        scores = score_block(block, RACE_LAPS, table, per_lap, pit_loss)
+        expected = [
+            simulate_race(plan_to_strategy(block.plan(i), RACE_LAPS), base_lap, pit_loss, None, None, None, None, track_env=env)[0]
+            for i in range(len(block))
+        ]
+        np.testing.assert_allclose(scores, expected, rtol=0, atol=1e-9)
+
+
+def test_evaluate_plans_finds_the_brute_force_optimum():
+    base_lap, pit_loss = 90.0, 4.0
+    best = min(
+        simulate_race(plan_to_strategy({"compounds": list(seq), "pit_laps": list(cuts)}, RACE_LAPS), base_lap, pit_loss, None, None, None, None)[0]
+        for seq, cuts in brute_force_plans()
+    )
+    result = evaluate_plans(
+        RACE_LAPS, COMPOUNDS, base_lap, pit_loss, None, None, None, None, None,
+        constraints=CONSTRAINTS, max_stops=MAX_STOPS,
+    )
+    assert result["evaluated"] == len(brute_force_plans())
+    assert abs(result["best"]["total_race_time"] - best) < 1e-9
@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+import numpy as np
+import pytest
+
+from sc_policy import COMPOUNDS, PIT_OK, STAY_OK, build_policy, decide
+from strategy_simulator import simulate_stint
+
+LAPS, BASE_LAP, PIT_LOSS, MAX_STOPS = 10, 90.0, 20.0, 2
+
+
+def stint_time(compound: str, laps: int) -> float:
+    return float(simulate_stint(compound, laps, BASE_LAP, None, None, None, None, None).sum()) if laps else 0.0
+
+
+@lru_cache(maxsize=None)
+def stay_out(lap: int, c: int, age: int, used: int, stops_left: int) -> float:
+    """Best remaining time when staying out at the start of ``lap``, by exhaustive search."""
+    best = float("inf")
+    for more in range(1, LAPS - lap + 2):
+        # A longer stint also changes the fuel credit of laps already run on the set
+        t = stint_time(COMPOUNDS[c], age + more) - stint_time(COMPOUNDS[c], age)
+        if lap + more > LAPS:
+            if bin(used).count("1") >= 2:
+                best = min(best, t)
+        elif stops_left:
+            for nxt in range(len(COMPOUNDS)):
+                best = min(best, t + PIT_LOSS + stay_out(lap + more, nxt, 0, used | 1 << nxt, stops_left - 1))
+    return best
+
+
+def box_now(lap: int, used: int, stops_left: int) -> float:
+    if not stops_left:
+        return float("inf")
+    return min(stay_out(lap, c, 0, used | 1 << c, stops_left - 1) for c in range(len(COMPOUNDS)))
+
+
+def test_policy_matches_brute_force():
+    policy = build_policy(LAPS, BASE_LAP, PIT_LOSS, max_stops=MAX_STOPS)
+    checked = 0
+    for lap in range(1, LAPS + 1):
+        for c in range(len(COMPOUNDS)):
+            for age in range(lap):
+                for used in range(1 << len(COMPOUNDS)):
+                    if not used & (1 << c):
+                        continue
+                    for stops_left in range(MAX_STOPS + 1):
+                        stay, pit = stay_out(lap, c, age, used, stops_left), box_now(lap, used, stops_left)
+                        flags = int(policy["feasible"][lap - 1, c, age, used, stops_left])
+                        assert bool(flags & STAY_OK) == np.isfinite(stay)
+                        assert bool(flags & PIT_OK) == np.isfinite(pit)
+                        if np.isfinite(stay) and np.isfinite(pit):
+                            delta = float(policy["delta"][lap - 1, c, age, used, stops_left])
+                            # delta is stored as float16
+                            assert delta == pytest.approx(stay - pit, rel=1e-3, abs=2e-2)
+                            checked += 1
+    assert checked > 1000
+
+
+def test_decide_rejects_impossible_states():
+    with pytest.raises(ValueError):
+        decide("Monaco", lap=500, compound="SOFT", tyre_age=1, compounds_used=[], stops_left=1)
+    with pytest.raises(ValueError):
+        decide("Monaco", lap=5, compound="SOFT", tyre_age=9, compounds_used=[], stops_left=1)
+
+
+def test_decide_flags_infeasible_states():
+    out = decide("Monaco", lap=30, compound="MEDIUM", tyre_age=10, compounds_used=["MEDIUM"], stops_left=0)
+    assert out["feasible"] is False
+    assert out["gain_s"] is None
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from scheduler import JobScheduler, SchedulerFull
+
+
+def blocked_scheduler(max_queue: int):
+    """A one-slot scheduler whose slot is busy until the returned event is set."""
+    scheduler = JobScheduler(slots=1, max_queue=max_queue, cores=1)
+    started, release = threading.Event(), threading.Event()
+    scheduler.submit(lambda: (started.set(), release.wait(5)))
+    assert started.wait(5)
+    return scheduler, release
+
+
+def test_lower_priority_value_runs_first():
+    scheduler, release = blocked_scheduler(max_queue=8)
+    order = []
+    futures = [scheduler.submit(order.append, p, priority=p) for p in (7, 1, 5, 1)]
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert order == [1, 1, 5, 7]
+
+
+def test_full_queue_raises_with_retry_after():
+    scheduler, release = blocked_scheduler(max_queue=2)
+    scheduler.submit(int)
+    scheduler.submit(int)
+    with pytest.raises(SchedulerFull) as exc:
+        scheduler.submit(int)
+    assert exc.value.retry_after >= 1
+    assert scheduler.stats()["rejected"] == 1
+    release.set()
+
+
+def test_compare_endpoint_returns_429(monkeypatch):
+    scheduler, release = blocked_scheduler(max_queue=1)
+    scheduler.submit(int)
+    monkeypatch.setattr(main, "scheduler", scheduler)
+    try:
+        r = TestClient(main.app).post("/strategy/compare", json={})
+    finally:
+        release.set()
+    assert r.status_code == 429
+    assert int(r.headers["retry-after"]) >= 1
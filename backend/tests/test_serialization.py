@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from serialization import LAPS_MEDIA_TYPE, decode_lap_buffers, encode_lap_buffers, negotiate
+
+DOC = {
+    "track": "Monaco",
+    "pit_loss": [18.0, 20.0, 22.0],
+    "best": {"lap_times": np.array([75.125, 75.5, np.nan]), "total": float("nan")},
+    "top": [{"strategy": [["SOFT", 30], ["HARD", 48]], "lap_times": [76.0, 76.25]}],
+}
+
+api = FastAPI()
+
+
+@api.get("/doc")
+def doc(request: Request):
+    return negotiate(request, DOC)
+
+
+@api.get("/big")
+def big(request: Request):
+    return negotiate(request, {"lap_times": np.linspace(70, 80, 5000)})
+
+
+client = TestClient(api)
+
+
+def test_lap_buffers_round_trip():
+    out = decode_lap_buffers(encode_lap_buffers(DOC))
+    np.testing.assert_array_equal(out["best"]["lap_times"], DOC["best"]["lap_times"].astype(np.float32))
+    np.testing.assert_array_equal(out["top"][0]["lap_times"], np.float32([76.0, 76.25]))
+    # Only lap series are packed; grid axes and other lists stay JSON
+    assert out["pit_loss"] == DOC["pit_loss"]
+    assert out["top"][0]["strategy"] == DOC["top"][0]["strategy"]
+    assert out["best"]["total"] is None
+
+
+def test_json_is_default_and_strict():
+    r = client.get("/doc")
+    assert r.headers["content-type"].startswith("application/json")
+    body = json.loads(r.content)  # json.loads would accept NaN; check the text too
+    assert b"NaN" not in r.content
+    assert body["best"]["lap_times"][2] is None
+
+
+def test_accept_selects_binary_laps():
+    r = client.get("/doc", headers={"Accept": f"{LAPS_MEDIA_TYPE}, application/json;q=0.5"})
+    assert r.headers["content-type"] == LAPS_MEDIA_TYPE
+    assert "Accept" in r.headers["vary"]
+    assert decode_lap_buffers(r.content)["track"] == "Monaco"
+
+
+def test_unknown_accept_falls_back_to_json():
+    r = client.get("/doc", headers={"Accept": "text/csv"})
+    assert r.headers["content-type"].startswith("application/json")
+
+
+def test_large_bodies_are_gzipped():
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert len(r.json()["lap_times"]) == 5000
+    small = client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_arrow_when_available():
+    pa = pytest.importorskip("pyarrow")
+    r = client.get("/doc", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    table = pa.ipc.open_stream(r.content).read_all()
+    assert table.column("path").to_pylist() == ["/best/lap_times", "/top/0/lap_times"]
@@ -0,0 +1,30 @@
+import numpy as np
+
+from strategy_simulator import simulate_race
+from sweep import sweep, sweep_totals
+
+STRATEGIES = [
+    [("SOFT", 18), ("HARD", 39)],
+    [("MEDIUM", 25), ("HARD", 32)],
+    [("SOFT", 15), ("MEDIUM", 20), ("SOFT", 22)],
+]
+PIT_LOSSES = [18.0, 22.5]
+TRACK_TEMPS = [25.0, 40.0]
+BASE_LAPS = [91.0, 93.5]
+
+
+def test_totals_match_simulate_race():
+    totals = sweep_totals(STRATEGIES, PIT_LOSSES, TRACK_TEMPS, BASE_LAPS)
+    assert totals.shape == (len(STRATEGIES), len(PIT_LOSSES), len(TRACK_TEMPS), len(BASE_LAPS))
+    for s, strategy in enumerate(STRATEGIES):
+        for p, pit_loss in enumerate(PIT_LOSSES):
+            for t, temp in enumerate(TRACK_TEMPS):
+                for b, base in enumerate(BASE_LAPS):
+                    expected, _ = simulate_race(strategy, base, pit_loss, None, None, None, None, track_env={"track_temp": temp})
+                    assert abs(totals[s, p, t, b] - expected) < 1e-6
+
+
+def test_winner_is_argmin_of_totals():
+    result = sweep(STRATEGIES, PIT_LOSSES, TRACK_TEMPS, BASE_LAPS, include_totals=True)
+    totals = np.asarray(result["totals"]).reshape(len(STRATEGIES), -1)
+    np.testing.assert_array_equal(result["winner"], totals.argmin(axis=0))
@@ -0,0 +1,203 @@
+"""Micro-batched serving of data/tyre_transformer.pt.
+
+Concurrent degradation requests are put on one queue. A single worker thread
+takes the first waiting request, keeps collecting until ``max_batch``
+requests are waiting or ``max_wait_ms`` has passed since that first
+arrival, and runs them as one padded forward pass. The model's causal mask
+means right-padding never changes the real laps, so batched and single
+predictions are identical.
+
+At most ``max_queue`` stints may wait; beyond that ``submit`` raises
+``SchedulerFull`` with a Retry-After estimate, so queue latency stays bounded
+under overload. Features are scaled with the saved scaler_X/scaler_y
+(mean/scale applied directly to the whole batch). Batch-size and
+queue-latency metrics are exposed through ``metrics()``.
+"""
+from __future__ import annotations
+
+import math
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import torch
+
+from artifact_store import load_torch_weights
+from model_def import TyreDegTransformer
+from scheduler import SchedulerFull
+
+BASE_DIR = Path(__file__).resolve().parent
+TRANSFORMER_PATH = BASE_DIR / "data" / "tyre_transformer.pt"
+SCALER_X_PATH = BASE_DIR / "data" / "scaler_X.pkl"
+SCALER_Y_PATH = BASE_DIR / "data" / "scaler_y.pkl"
+
+# Must match notebooks/data_retrieval_2025.ipynb
+FEAT_COLS = ["TyreLife", "LapFrac", "FuelLoadKgEst", "TrackTemp", "AirTemp", "ThermalDegProxy", "MechWearProxy"]
+COMPOUND_ORDER = {"SOFT": 0, "MEDIUM": 1, "HARD": 2, "INTERMEDIATE": 3, "WET": 4, "UNKNOWN": 5}
+TRAIN_SEQ_LEN = 30  # stint length seen in training; longer stints are extrapolated
+MAX_SEQ_LEN = 512  # positional encoding size
+DEFAULT_MAX_QUEUE = int(os.environ.get("F1_TYRE_QUEUE", "256"))
+
+
+def stint_features(
+    start_lap: int,
+    stint_laps: int,
+    total_laps: int,
+    track_temp: float,
+    air_temp: float,
+    start_fuel_kg: float = 100.0,
+    burn_per_lap: float = 1.7,
+) -> np.ndarray:
+    """Raw FEAT_COLS rows for a fresh-tyre stint, derived as in the 2025 pipeline."""
+    lap_no = np.arange(start_lap, start_lap + stint_laps, dtype=float)
+    tyre_life = np.arange(1, stint_laps + 1, dtype=float)
+    total = max(total_laps, 1)
+    return np.column_stack(
+        [
+            tyre_life,
+            lap_no / total,
+            np.maximum(0.0, start_fuel_kg - (lap_no - 1) * burn_per_lap),
+            np.full(stint_laps, float(track_temp)),
+            np.full(stint_laps, float(air_temp)),
+            tyre_life * (float(track_temp) / 35.0),
+            tyre_life * (1.0 + (lap_no / total) * 0.15),
+        ]
+    ).astype(np.float32)
+
+
+@dataclass
+class _Pending:
+    features: np.ndarray
+    compound_code: int
+    future: Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class TyreModelServer:
+    def __init__(
+        self, max_batch: int = 64, max_wait_ms: float = 5.0, max_queue: int = DEFAULT_MAX_QUEUE, window: int = 1000
+    ) -> None:
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+
+        self.model = TyreDegTransformer(num_features=len(FEAT_COLS))
+        load_torch_weights(self.model, "tyre_transformer", TRANSFORMER_PATH)
+        self.model.eval()
+        scaler_x = joblib.load(SCALER_X_PATH)
+        scaler_y = joblib.load(SCALER_Y_PATH)
+        self.x_mean = scaler_x.mean_.astype(np.float32)
+        self.x_scale = scaler_x.scale_.astype(np.float32)
+        self.y_mean = float(scaler_y.mean_[0])
+        self.y_scale = float(scaler_y.scale_[0])
+
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._queue_latency: deque = deque(maxlen=window)
+        self._compute_s: deque = deque(maxlen=window)
+        self._requests = 0
+        self._rejected = 0
+        threading.Thread(target=self._worker, name="tyre-batcher", daemon=True).start()
+
+    def submit(self, features: np.ndarray, compound: str) -> Future:
+        """Queue one stint (raw FEAT_COLS rows); the future resolves to lap times in seconds."""
+        features = np.asarray(features, dtype=np.float32)
+        if features.ndim != 2 or features.shape[1] != len(FEAT_COLS):
+            raise ValueError(f"Expected (laps, {len(FEAT_COLS)}) features, got {features.shape}")
+        if not 1 <= len(features) <= MAX_SEQ_LEN:
+            raise ValueError(f"Stint length must be 1..{MAX_SEQ_LEN} laps")
+        future: Future = Future()
+        code = COMPOUND_ORDER.get(compound.upper(), COMPOUND_ORDER["UNKNOWN"])
+        with self._lock:
+            depth = self._queue.qsize()
+            if depth >= self.max_queue:
+                self._rejected += 1
+                batch_s = float(np.mean(self._compute_s)) if self._compute_s else self.max_wait_s
+                raise SchedulerFull(retry_after=max(1, math.ceil(depth / self.max_batch * batch_s)))
+            self._queue.put(_Pending(features, code, future))
+        return future
+
+    def predict(self, features: np.ndarray, compound: str, timeout: Optional[float] = None) -> np.ndarray:
+        return self.submit(features, compound).result(timeout=timeout)
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                lengths = [len(p.features) for p in batch]
+                x = np.zeros((len(batch), max(lengths), len(FEAT_COLS)), dtype=np.float32)
+                for i, p in enumerate(batch):
+                    x[i, : lengths[i]] = p.features
+                x = (x - self.x_mean) / self.x_scale
+                compounds = torch.tensor([p.compound_code for p in batch], dtype=torch.long)
+                with torch.inference_mode():
+                    pred_z = self.model(torch.from_numpy(x), compounds).numpy()
+                pred_s = pred_z * self.y_scale + self.y_mean
+                for i, p in enumerate(batch):
+                    p.future.set_result(pred_s[i, : lengths[i]].astype(float))
+            except Exception as exc:
+                for p in batch:
+                    if not p.future.done():
+                        p.future.set_exception(exc)
+            finished = time.perf_counter()
+            with self._lock:
+                self._requests += len(batch)
+                self._batch_sizes[len(batch)] += 1
+                self._queue_latency.extend(started - p.enqueued_at for p in batch)
+                self._compute_s.append(finished - started)
+
+    def metrics(self) -> Dict[str, object]:
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            waits = np.array(self._queue_latency) * 1000.0
+            compute = np.array(self._compute_s) * 1000.0
+            return {
+                "requests": self._requests,
+                "rejected": self._rejected,
+                "batches": batches,
+                "mean_batch_size": round(self._requests / batches, 2) if batches else None,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "queue_depth": self._queue.qsize(),
+                "queue_latency_ms": {
+                    "p50": round(float(np.percentile(waits, 50)), 3),
+                    "p99": round(float(np.percentile(waits, 99)), 3),
+                    "max": round(float(waits.max()), 3),
+                } if len(waits) else None,
+                "batch_compute_ms_mean": round(float(compute.mean()), 3) if len(compute) else None,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_s * 1000.0,
+                "max_queue": self.max_queue,
+            }
+
+
+_server: Optional[TyreModelServer] = None
+_server_lock = threading.Lock()
+
+
+def get_tyre_server() -> TyreModelServer:
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = TyreModelServer()
+        return _server
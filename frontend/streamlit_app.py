@@ -4,12 +4,141 @@ Run:
 """
 from __future__ import annotations
 
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
 import requests
 import streamlit as st
 import plotly.graph_objects as go
 
 API_BASE = st.secrets.get("API_BASE", "http://127.0.0.1:8000") if hasattr(st, "secrets") else "http://127.0.0.1:8000"
 
+CACHE_TTL_S = 300.0
+CACHE_MAX_ENTRIES = 64
+DEBOUNCE_S = 0.35
+PREFETCH_PRIORITY = 9  # lowest priority in the backend scheduler queue
+
+
+class ResultCache:
+    """Thread-safe TTL/LRU cache of /strategy/compare responses keyed on the payload.
+
+    Concurrent requests for the same payload share one in-flight call, so two
+    reruns never train the same model twice. Foreground fetches have their own
+    executor and never queue behind prefetches: a prefetch still waiting for a
+    thread is dropped when the sliders move on or taken over by the foreground,
+    and one already running is re-issued at foreground priority rather than
+    joined at PREFETCH_PRIORITY (its result still lands in the cache).
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._prefetching: Dict[str, Future] = {}
+        # Re-entrant: Future.cancel() runs done-callbacks, which take the lock, in the caller
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fetch")
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+    @staticmethod
+    def key(payload: dict) -> str:
+        return json.dumps(payload, sort_keys=True)
+
+    def _lookup(self, key: str) -> Optional[dict]:
+        """Cached value for ``key``; caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl_s:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, payload: dict) -> Optional[dict]:
+        with self._lock:
+            return self._lookup(self.key(payload))
+
+    def _put(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _post(self, key: str, payload: dict, priority: int) -> dict:
+        r = requests.post(f"{API_BASE}/strategy/compare", params={"priority": priority}, json=payload, timeout=20)
+        if not r.ok:
+            raise RuntimeError(f"API error {r.status_code}: {r.text}")
+        result = r.json()
+        self._put(key, result)
+        return result
+
+    def _forget(self, key: str, future: Future) -> None:
+        # Only clear the slot if a newer call has not taken it over
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if self._prefetching.get(key) is future:
+                del self._prefetching[key]
+
+    def _submit(self, payload: dict, priority: int, background: bool) -> Tuple[Optional[dict], Optional[Future]]:
+        key = self.key(payload)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                return cached, None
+            future = self._inflight.get(key)
+            if future is not None and not background and key in self._prefetching:
+                # Drop the prefetch if it has not started; otherwise let it finish but stop waiting on it
+                future.cancel()
+                self._prefetching.pop(key, None)
+                future = None
+            if future is None:
+                pool = self._prefetch_pool if background else self._pool
+                future = pool.submit(self._post, key, payload, priority)
+                self._inflight[key] = future
+                if background:
+                    self._prefetching[key] = future
+                future.add_done_callback(lambda f, key=key: self._forget(key, f))
+        return None, future
+
+    def fetch(self, payload: dict, priority: int = 5) -> dict:
+        cached, future = self._submit(payload, priority, background=False)
+        return cached if cached is not None else future.result()
+
+    def prefetch(self, payloads: List[dict]) -> None:
+        wanted = {self.key(p) for p in payloads}
+        with self._lock:
+            for key, future in list(self._prefetching.items()):
+                if key not in wanted and future.cancel():
+                    self._prefetching.pop(key, None)
+                    self._inflight.pop(key, None)
+        for payload in payloads:
+            self._submit(payload, PREFETCH_PRIORITY, background=True)
+
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    return ResultCache(ttl_s=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES)
+
+
+def neighbour_payloads(payload: dict) -> List[dict]:
+    """Payloads one slider step away on the temperature sliders."""
+    out = []
+    for field, lo, hi in (("track_temp_c", 15, 50), ("air_temp_c", 5, 40)):
+        for step in (-1.0, 1.0):
+            value = payload[field] + step
+            if lo <= value <= hi:
+                out.append({**payload, field: value})
+    return out
+
+
 st.set_page_config(page_title="F1 Strategy Predictor", page_icon="🏎️", layout="wide")
 
 st.markdown(
@@ -39,6 +168,7 @@ with st.sidebar:
     air_temp = st.slider("Air Temp (°C)", 5, 40, 26)
     total_laps = st.slider("Race Laps", 10, 90, 57)
     fuel_kg = st.slider("Fuel Load (kg)", 10.0, 110.0, 28.3, 0.1)
+    prefetch = st.checkbox("Prefetch neighbouring temperatures", value=False)
 
 payload = {
     "year": int(year),
@@ -51,16 +181,23 @@ payload = {
     "total_laps": int(total_laps),
 }
 
-resp = None
+cache = get_result_cache()
+resp = cache.get(payload)
 err = None
-try:
-    r = requests.post(f"{API_BASE}/strategy/compare", json=payload, timeout=20)
-    if not r.ok:
-        err = f"API error {r.status_code}: {r.text}"
-    else:
-        resp = r.json()
-except Exception as exc:
-    err = f"Could not reach API: {exc}"
+if resp is None:
+    # Debounce: a slider change during the pause makes Streamlit stop this run
+    # at the next st.* call, before the request is fired.
+    time.sleep(DEBOUNCE_S)
+    with st.spinner("Simulating strategies..."):
+        try:
+            resp = cache.fetch(payload)
+        except RuntimeError as exc:
+            err = str(exc)
+        except Exception as exc:
+            err = f"Could not reach API: {exc}"
+
+if prefetch and resp is not None:
+    cache.prefetch(neighbour_payloads(payload))
 
 if err:
     st.error(err)